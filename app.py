@@ -1,14 +1,28 @@
-from flask import Config, Flask, request, jsonify
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
+from time import perf_counter
+
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 
+from config import Config
+from crawler_helper import page_archive, parsed_page_cache
+from circuit_breaker import circuit_breaker
+from rate_limiter import rate_limiter
+from metrics import metrics
+from negative_cache import negative_cache
+from profiling import Profiler
 from scraper_main import (
     get_all_ipo_listing_with_gmp_link,
+    fill_pending_sections,
     get_stock_details_and_gmp_from_symbol,
+    get_subscription_listing,
 )
 
 from dotenv import load_dotenv
-from crawler_helper import scrape_page
-from parse_subscription import parse_subscription_page
+from cache_backend import get_cache_backend
+from response_cache import ResponseCache, make_cache_key
+from scheduler import build_default_scheduler
 
 load_dotenv()
 
@@ -17,6 +31,126 @@ CORS(app)
 
 app.config.from_object(Config)
 
+cache_backend = get_cache_backend()
+response_cache = ResponseCache(cache_backend, lock_ttl=Config.CACHE_LOCK_TTL)
+
+# A process-local backend gives the scheduler nothing to share
+scheduler = build_default_scheduler(
+    None if Config.CACHE_BACKEND == "memory" else cache_backend
+)
+if app.config["SCHEDULER_ENABLED"]:
+    scheduler.start()
+
+
+# ------------------------------------------------
+# Function to serve the latest background snapshot of a dataset
+# @param name - Dataset name registered on the scheduler
+# @param key - Key inside a keyed dataset (None for plain datasets)
+# @return response - JSON response, or None when no snapshot is available
+# ------------------------------------------------
+def snapshot_response(name, key=None):
+    if not app.config["SCHEDULER_ENABLED"]:
+        return None
+    snapshot = scheduler.snapshot(name)
+    payload = snapshot.get(key) if snapshot else None
+    if payload is None:
+        return None
+    response = Response(payload, mimetype="application/json")
+    response.headers["X-Cache"] = "SNAPSHOT"
+    response.headers["Age"] = str(int(snapshot.age()))
+    return response
+
+
+# ------------------------------------------------
+# Function to serve a JSON payload through the response cache
+# @param endpoint - Route name used in the cache key
+# @param args - Query args used in the cache key
+# @param loader - Function producing the payload (None means failure)
+# @param ttl - Freshness window in seconds
+# @param cacheable - Optional predicate for payloads that may be cached
+# @return response - JSON response with X-Cache and Age headers, or None
+# ------------------------------------------------
+def cached_json(endpoint, args, loader, ttl, cacheable=None):
+    data, state, age = response_cache.get(
+        make_cache_key(endpoint, args),
+        loader,
+        ttl,
+        app.config["CACHE_MAX_STALE"],
+        cacheable,
+    )
+    if data is None:
+        return None
+    with metrics.timed("ipo_serialization_duration_seconds", endpoint=endpoint):
+        response = jsonify(data)
+    response.headers["X-Cache"] = state
+    response.headers["Age"] = str(int(age))
+    return response
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = perf_counter()
+
+
+# ------------------------------------------------
+# Opt-in profiling: with PROFILING_ENABLED, a request carrying
+# "X-Profile: 1" or "?profile=1" runs under the profiler. The report is
+# saved to PROFILE_DIR and named in the X-Profile-Report header;
+# "inline" as the value returns the report instead of the normal body.
+# ------------------------------------------------
+def profile_mode():
+    if not app.config["PROFILING_ENABLED"]:
+        return None
+    value = request.headers.get("X-Profile") or request.args.get("profile")
+    if value in ("1", "true", "inline"):
+        return value
+    return None
+
+
+@app.before_request
+def start_profiler():
+    mode = profile_mode()
+    if mode:
+        g.profile_mode = mode
+        g.profiler = Profiler(request.full_path).start()
+
+
+@app.after_request
+def finish_profiler(response):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    if not profiler.active:
+        response.headers["X-Profile-Report"] = "busy"
+        return response
+    profiler.stop()
+    path = profiler.save(app.config["PROFILE_DIR"], app.config["PROFILE_TOP_N"])
+    if g.profile_mode == "inline":
+        response = Response(
+            profiler.report(app.config["PROFILE_TOP_N"]), mimetype="text/plain"
+        )
+    response.headers["X-Profile-Report"] = path
+    return response
+
+
+@app.teardown_request
+def release_profiler(error):
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
+
+
+@app.after_request
+def record_request_duration(response):
+    if "request_started" in g:
+        metrics.observe(
+            "ipo_request_duration_seconds",
+            perf_counter() - g.request_started,
+            endpoint=request.endpoint or "unknown",
+            status=response.status_code,
+        )
+    return response
+
 
 # ------------------------------------------------
 # GET /calendar
@@ -24,20 +158,160 @@ app.config.from_object(Config)
 # ------------------------------------------------
 @app.route("/calendar")
 def get_calendar():
-    return get_all_ipo_listing_with_gmp_link()
+    snapshot = snapshot_response("calendar")
+    if snapshot is not None:
+        return snapshot
+    response = cached_json(
+        "calendar",
+        None,
+        lambda: get_all_ipo_listing_with_gmp_link() or None,
+        app.config["CALENDAR_CACHE_TTL"],
+    )
+    return response if response is not None else jsonify([])
 
 
 # ------------------------------------------------
 # GET /details/<symbol>
 # @param symbol - Stock symbol
 # @param gmp_url - GMP URL (Query Param)
+# @param deadline_ms - Latency budget in ms (Query Param, defaults to
+#                      DETAILS_DEADLINE_MS). Sections not crawled in time are
+#                      listed under "pending", or under "stale" when an
+#                      older copy was served in their place. Sections whose
+#                      page could not be fetched are listed under "failed".
 # Returns the IPO details and GMP timeline for a given symbol
 @app.route("/details")
 def get_ipo_details_by_symbol():
     gmp_url = request.args.get("gmp_url")
     details_url = request.args.get("details_url")
-    response = get_stock_details_and_gmp_from_symbol(details_url, gmp_url)
-    return response
+    deadline_ms = request.args.get(
+        "deadline_ms", app.config["DETAILS_DEADLINE_MS"], type=int
+    )
+    args = {"details_url": details_url, "gmp_url": gmp_url}
+    snapshot = snapshot_response("details", make_cache_key("details", args))
+    if snapshot is not None:
+        return snapshot
+    response = cached_json(
+        "details",
+        args,
+        details_loader(details_url, gmp_url, deadline_ms),
+        app.config["DETAILS_CACHE_TTL"],
+        is_complete,
+    )
+    return response if response is not None else jsonify({})
+
+
+# ------------------------------------------------
+# Function to build the response-cache loader for one /details payload
+# A payload cut short by the deadline takes its missing sections from the
+# expired cache entry when there is one; such payloads are never cached.
+# @param details_url - zerodha IPO page URL
+# @param gmp_url - ipowatch GMP page URL
+# @param deadline_ms - Latency budget in ms (0 or None for no limit)
+# @return loader - Zero-argument function
+# ------------------------------------------------
+def details_loader(details_url, gmp_url, deadline_ms):
+    key = make_cache_key("details", {"details_url": details_url, "gmp_url": gmp_url})
+
+    def load():
+        data = get_stock_details_and_gmp_from_symbol(
+            details_url, gmp_url, deadline_ms=deadline_ms or None
+        )
+        if data and "pending" in data:
+            previous = response_cache.backend.get(key)
+            fill_pending_sections(data, previous[0] if previous else None)
+        return data or None
+
+    return load
+
+
+# ------------------------------------------------
+# Function to tell whether a /details payload may be cached
+# Payloads with pending, stale or failed sections are served but not
+# cached, so the next request crawls again. A GMP page that is missing or
+# has no rows yet is a complete answer.
+# @param data - /details payload
+# @return bool
+# ------------------------------------------------
+def is_complete(data):
+    return not any(marker in data for marker in ("pending", "stale", "failed"))
+
+
+# ------------------------------------------------
+# Function to get one /details payload from the snapshot or the cache
+# @param details_url - zerodha IPO page URL
+# @param gmp_url - ipowatch GMP page URL
+# @param deadline_ms - Latency budget in ms (0 or None for no limit)
+# @return data - Same object /details returns
+# ------------------------------------------------
+def load_details(details_url, gmp_url, deadline_ms=None):
+    key = make_cache_key("details", {"details_url": details_url, "gmp_url": gmp_url})
+    if app.config["SCHEDULER_ENABLED"]:
+        snapshot = scheduler.snapshot("details")
+        if snapshot is not None and key in snapshot.data:
+            return snapshot.data[key]
+    data, _, _ = response_cache.get(
+        key,
+        details_loader(details_url, gmp_url, deadline_ms),
+        app.config["DETAILS_CACHE_TTL"],
+        app.config["CACHE_MAX_STALE"],
+        is_complete,
+    )
+    return data or {}
+
+
+# ------------------------------------------------
+# POST /details/batch
+# @body - JSON list of {"details_url", "gmp_url"} objects
+# @param deadline_ms - Latency budget in ms per item (Query Param, defaults
+#                      to DETAILS_DEADLINE_MS)
+# Streams one NDJSON line per item as soon as it is ready:
+# {"index", "details_url", "gmp_url", "data"} where data has the /details
+# shape (or "error" when the item failed). Lines arrive in completion order.
+# ------------------------------------------------
+@app.route("/details/batch", methods=["POST"])
+def get_ipo_details_batch():
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        return jsonify({"error": "Expected a JSON list of {details_url, gmp_url}"}), 400
+    if len(items) > app.config["DETAILS_BATCH_MAX"]:
+        return (
+            jsonify({"error": f"At most {app.config['DETAILS_BATCH_MAX']} items"}),
+            400,
+        )
+
+    deadline_ms = request.args.get(
+        "deadline_ms", app.config["DETAILS_DEADLINE_MS"], type=int
+    )
+
+    def generate():
+        executor = ThreadPoolExecutor(max_workers=app.config["CRAWL_MAX_WORKERS"])
+        try:
+            futures = {
+                executor.submit(
+                    load_details,
+                    item.get("details_url"),
+                    item.get("gmp_url"),
+                    deadline_ms,
+                ): index
+                for index, item in enumerate(items)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                line = {
+                    "index": index,
+                    "details_url": items[index].get("details_url"),
+                    "gmp_url": items[index].get("gmp_url"),
+                }
+                try:
+                    line["data"] = future.result()
+                except Exception as e:
+                    line["error"] = str(e)
+                yield json.dumps(line) + "\n"
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return Response(generate(), mimetype="application/x-ndjson")
 
 
 def clean(text):
@@ -47,19 +321,51 @@ def clean(text):
 @app.route("/subscription")
 def get_subscription():
     try:
-        url = "https://ipopremium.in/view/subscription"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.1.0.000 Safari/537.36"
-        }
-        soup = scrape_page(url, headers=headers)
-        if not soup:
+        snapshot = snapshot_response("subscription")
+        if snapshot is not None:
+            return snapshot
+        response = cached_json(
+            "subscription",
+            None,
+            get_subscription_listing,
+            app.config["SUBSCRIPTION_CACHE_TTL"],
+        )
+        if response is None:
             return jsonify({"error": "Failed to fetch subscription page"}), 500
-        ipos = parse_subscription_page(soup)
-        return jsonify(ipos)
+        return response
     except Exception as e:
         app.logger.error(f"Error in get_subscription: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+# ------------------------------------------------
+# GET /status
+# Returns last-run duration and success status of the background refreshes
+# ------------------------------------------------
+@app.route("/status")
+def get_status():
+    return jsonify(
+        {
+            "schedulerEnabled": app.config["SCHEDULER_ENABLED"],
+            "datasets": scheduler.status(),
+            "parsedPageCache": parsed_page_cache.stats(),
+            "negativeCache": negative_cache.stats(),
+            "hostRates": rate_limiter.rates(),
+            "hostCircuits": circuit_breaker.states(),
+            "pageArchive": page_archive.stats() if page_archive else None,
+        }
+    )
+
+
+# ------------------------------------------------
+# GET /metrics
+# Returns fetch / parse / matching / serialization timings and error
+# counts in Prometheus text format (per worker process)
+# ------------------------------------------------
+@app.route("/metrics")
+def get_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     app.run(port=8000)
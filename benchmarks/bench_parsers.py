@@ -0,0 +1,163 @@
+"""
+Offline benchmarks for the page parsers.
+
+Runs every parser over synthetic pages (small and large), with --corpus
+over saved HTML pages laid out as <corpus>/<kind>/*.html where <kind> is
+one of home, details, gmp, listing, subscription, and with --archive over
+the latest copy of every page in the raw page archive. Reports time
+per page, rows per second and peak traced memory, writes the results to
+a JSON file and can compare against an earlier run.
+
+    python -m benchmarks.bench_parsers
+    python -m benchmarks.bench_parsers --corpus saved_pages --compare old.json
+    python -m benchmarks.bench_parsers --no-synthetic --archive page_archive.sqlite3
+"""
+
+from datetime import datetime
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+from benchmarks import fixtures
+from page_archive import PageArchive
+from reparse import PARSERS, classify_url, select_pages
+
+
+def _count_rows(result):
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if "gmpTimeline" in result:
+        return len(result["gmpTimeline"])
+    if "schedule" in result:
+        return len(result["schedule"]) + len(result["strengths"]) + len(result["risks"])
+    return 1
+
+
+def synthetic_corpus():
+    return [
+        ("home", "home-10", fixtures.home_page(10)),
+        ("home", "home-500", fixtures.home_page(500)),
+        ("details", "details", fixtures.details_page()),
+        ("details", "details-large", fixtures.details_page(50, 200, 200)),
+        ("gmp", "gmp-10", fixtures.gmp_page(10)),
+        ("gmp", "gmp-500", fixtures.gmp_page(500)),
+        ("listing", "listing-40", fixtures.listing_page(40)),
+        ("listing", "listing-1000", fixtures.listing_page(1000)),
+        ("subscription", "subscription-5", fixtures.subscription_page(5)),
+        ("subscription", "subscription-300", fixtures.subscription_page(300)),
+    ]
+
+
+def saved_corpus(directory):
+    pages = []
+    for kind in PARSERS:
+        for path in sorted(glob.glob(os.path.join(directory, kind, "*.html"))):
+            with open(path, "rb") as f:
+                pages.append((kind, os.path.relpath(path, directory), f.read()))
+    return pages
+
+
+def archived_corpus(path):
+    archive = PageArchive(path)
+    pages = []
+    for page in archive.read(select_pages(archive)):
+        if page.status != 200:
+            continue
+        kind = classify_url(page.url)
+        pages.append((kind, f"archive:{kind}:{page.url}", page.body))
+    return pages
+
+
+# ------------------------------------------------
+#  Function to benchmark one parser on one page
+#  Soup construction with the parser's strategy is included in the timing.
+#  @param kind - Parser kind (key of PARSERS)
+#  @param html - Page markup (str or bytes)
+#  @param repeat - Number of timed runs
+#  @return result - Dict of timings, rows/sec and peak memory
+# ------------------------------------------------
+def bench_page(kind, html, repeat):
+    strategy, parse = PARSERS[kind]
+    content = html.encode("utf-8") if isinstance(html, str) else html
+
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = _count_rows(parse(strategy.make_soup(content)))
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    parse(strategy.make_soup(content))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        "kind": kind,
+        "bytes": len(content),
+        "rows": rows,
+        "medianMs": round(median * 1000, 3),
+        "minMs": round(min(timings) * 1000, 3),
+        "rowsPerSec": round(rows / median, 1) if median and rows else 0,
+        "peakKb": round(peak / 1024, 1),
+    }
+
+
+def compare(results, previous):
+    print(f"\n{'page':<32}{'before ms':>12}{'after ms':>12}{'change':>10}")
+    for name, result in results.items():
+        old = previous.get(name)
+        if not old:
+            continue
+        change = (result["medianMs"] - old["medianMs"]) / old["medianMs"] * 100
+        print(f"{name:<32}{old['medianMs']:>12}{result['medianMs']:>12}{change:>9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the page parsers offline")
+    parser.add_argument("--corpus", help="Directory of saved pages (<kind>/*.html)")
+    parser.add_argument("--archive", help="Page archive to take real pages from")
+    parser.add_argument("--no-synthetic", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Where to save the results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    pages = [] if args.no_synthetic else synthetic_corpus()
+    if args.corpus:
+        pages.extend(saved_corpus(args.corpus))
+    if args.archive:
+        pages.extend(archived_corpus(args.archive))
+
+    results = {}
+    print(f"{'page':<32}{'rows':>7}{'median ms':>12}{'rows/s':>12}{'peak KiB':>11}")
+    for kind, name, html in pages:
+        result = bench_page(kind, html, args.repeat)
+        results[name] = result
+        print(
+            f"{name:<32}{result['rows']:>7}{result['medianMs']:>12}"
+            f"{result['rowsPerSec']:>12}{result['peakKb']:>11}"
+        )
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"parsers-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Synthetic upstream pages for offline benchmarks and load tests.
+
+Each generator returns HTML shaped like the live page its parser reads
+(zerodha home/details pages, ipowatch listing/GMP pages, ipopremium
+subscription page), with as many rows/blocks as requested.
+"""
+
+from datetime import date, timedelta
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+FULL_MONTHS = [
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+]
+
+PADDING = "<div class='nav'>" + "<a href='#'>menu</a>" * 50 + "</div>"
+
+
+def company_name(i):
+    return f"Company {chr(65 + i % 26)}{i} Technologies Ltd"
+
+
+def company_slug(i):
+    return f"company-{chr(97 + i % 26)}{i}"
+
+
+def _day(i):
+    d = date(2024, 1, 1) + timedelta(days=i % 330)
+    return d
+
+
+def home_page(rows, base_url="https://zerodha.com/"):
+    body = []
+    for i in range(rows):
+        # Keep the IPO window inside one month ("21st – 23rd Oct 2024")
+        end = date(2024, 1 + i % 12, 3 + i % 25)
+        start = end - timedelta(days=2)
+        listing = end + timedelta(days=3)
+        body.append(
+            f"""<tr>
+<td class="name"><img src="{base_url}static/logo{i}.png">
+<a href="ipo/{i}/{company_slug(i)}/"><span class="ipo-symbol">SYM{chr(65 + i % 26)} SME</span>
+<span class="ipo-name">{company_name(i)}</span></a></td>
+<td class="date">
+<span>IPO date</span>
+{start.day}th – {end.day}th {MONTHS[end.month - 1]} {end.year}
+</td>
+<td class="date">{listing.day} {MONTHS[listing.month - 1]} {listing.year}</td>
+<td class="text-right">₹{100 + i} – ₹{110 + i}</td>
+</tr>"""
+        )
+    return f"""<html><head><title>IPO</title></head><body>{PADDING}
+<div class="table-container"><table><thead><tr><th>Name</th></tr></thead>
+<tbody>{"".join(body)}</tbody></table></div>
+{PADDING}</body></html>"""
+
+
+def details_page(schedule_rows=6, paragraphs=5, list_items=5):
+    schedule = "".join(
+        f"""<tr><td class="ipo-schedule-label">Event {i}</td>
+<td class="ipo-schedule-date">{_day(i).day} {MONTHS[_day(i).month - 1]} 2024 (5 PM)</td></tr>"""
+        for i in range(schedule_rows)
+    )
+    about = "".join(f"<p>About paragraph {i}.</p>" for i in range(paragraphs))
+    strengths = "".join(f"<li>Strength {i}</li>" for i in range(list_items))
+    risks = "".join(f"<li>Risk {i}</li>" for i in range(list_items))
+    return f"""<html><body>{PADDING}
+<div class="ipo-meta">
+<div class="four columns"><div class="value">21st – 23rd Oct 2024</div></div>
+<div class="four columns"><div class="value">28 Oct 2024</div></div>
+<div class="three columns"><div class="value">₹100 – ₹110</div>
+<div class="text-12">Lot size 100 — ₹11000</div></div>
+<div class="two columns"><div class="value">₹500 Cr</div></div>
+</div>
+<table class="ipo-schedule">{schedule}</table>
+<section id="ipo"><div class="row"><div class="six columns">x</div>
+<div class="six columns">{about}</div></div></section>
+<h3>Strengths</h3><ul>{strengths}</ul>
+<h3>Risks</h3><ul>{risks}</ul>
+{PADDING}</body></html>"""
+
+
+def gmp_page(rows, title="Company IPO GMP"):
+    timeline = "".join(
+        f"<tr><td>{_day(i).day} {FULL_MONTHS[_day(i).month - 1]}</td><td>₹{i % 90}</td></tr>"
+        for i in range(rows)
+    )
+    details = """
+<tr><td>Face Value</td><td>₹10 Per Equity Share</td></tr>
+<tr><td>Offer for Sale</td><td>1,20,000 Shares</td></tr>
+<tr><td>IPO Listing</td><td>NSE, BSE</td></tr>
+<tr><td>Retail Quota</td><td>35%</td></tr>
+<tr><td>QIB Quota</td><td>50%</td></tr>
+<tr><td>NII Quota</td><td>15%</td></tr>
+<tr><td>DRHP Draft Prospectus</td><td><a href="https://example.com/drhp.pdf">Click</a></td></tr>
+<tr><td>RHP Draft Prospectus</td><td><a href="#">Click</a></td></tr>"""
+    return f"""<html><body>{PADDING}
+<h1 class="elementor-heading-title elementor-size-default">{title}</h1>
+<figure class="wp-block-table"><table><tbody>
+<tr><td>Date</td><td>GMP</td></tr>{timeline}</tbody></table></figure>
+<figure class="wp-block-table"><table><tbody>{details}</tbody></table></figure>
+{PADDING}</body></html>"""
+
+
+def gmp_not_found_page():
+    return f"""<html><body>{PADDING}
+<h1 class="elementor-heading-title elementor-size-default">404</h1>
+{PADDING}</body></html>"""
+
+
+def listing_page(rows, base_url="https://ipowatch.in/", start=0):
+    body = "".join(
+        f"""<tr><td><a href="{base_url}{company_slug(i)}-ipo-date-review-price-allotment-details/">
+{company_name(i).replace(" Technologies Ltd", "")} IPO</a></td><td>Oct 2024</td></tr>"""
+        for i in range(start, start + rows)
+    )
+    return f"""<html><body>{PADDING}
+<table><tr><th>IPO Name</th><th>Date</th></tr>{body}</table>
+{PADDING}</body></html>"""
+
+
+def subscription_page(blocks):
+    out = []
+    for i in range(blocks):
+        out.append(
+            f"""<div class="watermark"><table>
+<tr><td colspan="2">{company_name(i)} (Mainboard)</td></tr>
+<tr><td>Date: 21st to 23rd Oct 2024</td><td>₹ {100 + i} to {110 + i}</td></tr>
+</table>
+<table><tr><th>Category</th><th>Offered</th><th>Applied</th><th>Times</th></tr>
+<tr><td>QIBs</td><td>100</td><td>250</td><td>2.5</td></tr>
+<tr><td>HNIs</td><td>100</td><td>150</td><td>1.5</td></tr>
+<tr><td>HNIs 10+</td><td>60</td><td>90</td><td>1.5</td></tr>
+<tr><td>Retail</td><td>100</td><td>300</td><td>3.0</td></tr>
+<tr><td>Employees</td><td>10</td><td>5</td><td>0.5</td></tr>
+<tr><td>Total</td><td>310</td><td>705</td><td>2.27</td></tr>
+</table>
+<p class="text-center">Last updated on 23-Oct-2024 17:00:00</p></div>"""
+        )
+    return f"""<html><body>{PADDING}{"".join(out)}{PADDING}</body></html>"""
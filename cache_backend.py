@@ -0,0 +1,218 @@
+from collections import OrderedDict
+from importlib import import_module
+from threading import Lock, get_ident, local
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+from config import Config
+
+
+# ------------------------------------------------
+#  Interface shared by the cache backends
+#  Values must be JSON serializable. Locks are leases: they expire after
+#  `ttl` seconds so a crashed worker cannot hold a key forever.
+#  Values set with `expire_after` are dropped once that many seconds have
+#  passed and, oldest first, when more than `max_entries` of them are
+#  stored. Values set without it (scheduler snapshots, refresh times) are
+#  kept until overwritten.
+# ------------------------------------------------
+class CacheBackend:
+    # ------------------------------------------------
+    #  Function to read a value
+    #  @param key - Cache key
+    #  @return (value, stored_at) - stored_at is a time.time() timestamp,
+    #                               None when the key is missing
+    # ------------------------------------------------
+    def get(self, key):
+        raise NotImplementedError
+
+    # ------------------------------------------------
+    #  Function to write a value
+    #  @param key - Cache key
+    #  @param value - JSON serializable value
+    #  @param expire_after - Optional seconds after which the value is dropped
+    # ------------------------------------------------
+    def set(self, key, value, expire_after=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    # ------------------------------------------------
+    #  Function to take the refresh lock for a key
+    #  @param key - Cache key
+    #  @param ttl - Seconds before the lock expires on its own
+    #  @return token - Opaque token for unlock(), None if the lock is held
+    # ------------------------------------------------
+    def try_lock(self, key, ttl):
+        raise NotImplementedError
+
+    def unlock(self, key, token):
+        raise NotImplementedError
+
+
+# ------------------------------------------------
+#  Single-process backend (the default)
+# ------------------------------------------------
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries
+        self._values = {}
+        # Keys set with expire_after -> expiry time, oldest write first
+        self._expiry = OrderedDict()
+        self._locks = {}
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._values.get(key)
+
+    def set(self, key, value, expire_after=None):
+        now = time.time()
+        with self._lock:
+            self._values[key] = (value, now)
+            self._expiry.pop(key, None)
+            if expire_after is not None:
+                self._expiry[key] = now + expire_after
+            self._evict(now)
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+            self._expiry.pop(key, None)
+
+    def _evict(self, now):
+        for key in [k for k, expires_at in self._expiry.items() if expires_at <= now]:
+            del self._expiry[key]
+            del self._values[key]
+        while self.max_entries and len(self._expiry) > self.max_entries:
+            key, _ = self._expiry.popitem(last=False)
+            del self._values[key]
+
+    def try_lock(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            held = self._locks.get(key)
+            if held and held[1] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._locks[key] = (token, now + ttl)
+            return token
+
+    def unlock(self, key, token):
+        with self._lock:
+            if self._locks.get(key, (None,))[0] == token:
+                del self._locks[key]
+
+
+# ------------------------------------------------
+#  Backend shared by every process on the host (gunicorn workers, CLI runs)
+#  SQLite in WAL mode, one connection per thread.
+# ------------------------------------------------
+class SQLiteCacheBackend(CacheBackend):
+    def __init__(self, path, max_entries=None):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, "
+            "value TEXT NOT NULL, stored_at REAL NOT NULL, expires_at REAL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS locks "
+            "(key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = (
+            self._conn()
+            .execute("SELECT value, stored_at FROM cache WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expire_after=None):
+        now = time.time()
+        expires_at = None if expire_after is None else now + expire_after
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, expires_at),
+            )
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+            if self.max_entries:
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                    "WHERE expires_at IS NOT NULL "
+                    "ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def try_lock(self, key, ttl):
+        now = time.time()
+        token = f"{os.getpid()}-{get_ident()}-{uuid.uuid4().hex}"
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now)
+            )
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO locks (key, token, expires_at) VALUES (?, ?, ?)",
+                (key, token, now + ttl),
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return token if inserted else None
+
+    def unlock(self, key, token):
+        self._conn().execute(
+            "DELETE FROM locks WHERE key = ? AND token = ?", (key, token)
+        )
+
+
+# ------------------------------------------------
+#  Function to build the backend selected by Config.CACHE_BACKEND
+#  "memory", "sqlite", or "package.module:ClassName" for a custom backend
+#  (e.g. a Redis one) constructed without arguments.
+#  @return backend - CacheBackend
+# ------------------------------------------------
+def get_cache_backend():
+    name = Config.CACHE_BACKEND
+    if name == "memory":
+        return MemoryCacheBackend(Config.CACHE_MAX_ENTRIES)
+    if name == "sqlite":
+        return SQLiteCacheBackend(Config.CACHE_DB_PATH, Config.CACHE_MAX_ENTRIES)
+    module_name, _, class_name = name.partition(":")
+    return getattr(import_module(module_name), class_name)()
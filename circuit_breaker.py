@@ -0,0 +1,107 @@
+from datetime import datetime
+from threading import Lock
+import time
+
+from config import Config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+
+# ------------------------------------------------
+#  Per-host circuit breakers
+#  After `failure_threshold` consecutive failures (connection errors,
+#  timeouts or 5xx) a host is short-circuited for `cooldown` seconds:
+#  allow() answers False straight away so callers can fall back to cached
+#  data instead of waiting on a dead upstream. When the cool-down is over
+#  a single probe request is let through; its outcome closes the circuit
+#  or opens it for another cool-down.
+# ------------------------------------------------
+class HostCircuitBreaker:
+    def __init__(self, failure_threshold, cooldown):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._circuits = {}
+        self._lock = Lock()
+
+    def _circuit(self, host):
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = _Circuit()
+        return circuit
+
+    # ------------------------------------------------
+    #  Function to check whether a request to a host may go out
+    #  @param host - Host name (netloc)
+    #  @return allowed - False while the host's circuit is open
+    # ------------------------------------------------
+    def allow(self, host):
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.state == CLOSED:
+                return True
+            if circuit.state == OPEN:
+                if time.monotonic() - circuit.opened_at < self.cooldown:
+                    return False
+                circuit.state = HALF_OPEN
+                circuit.probing = False
+            # Half open: one probe at a time
+            if circuit.probing:
+                return False
+            circuit.probing = True
+            return True
+
+    def record_success(self, host):
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.state != CLOSED:
+                print(f"[DEBUG] {datetime.now()} {host} recovered, circuit closed")
+            circuit.state = CLOSED
+            circuit.failures = 0
+            circuit.probing = False
+
+    # ------------------------------------------------
+    #  Function to hand back a half-open probe that was never sent
+    #  @param host - Host name (netloc)
+    # ------------------------------------------------
+    def release_probe(self, host):
+        with self._lock:
+            self._circuit(host).probing = False
+
+    def record_failure(self, host):
+        with self._lock:
+            circuit = self._circuit(host)
+            circuit.failures += 1
+            circuit.probing = False
+            if circuit.state == HALF_OPEN or (
+                circuit.state == CLOSED and circuit.failures >= self.failure_threshold
+            ):
+                circuit.state = OPEN
+                circuit.opened_at = time.monotonic()
+                print(
+                    f"[ERROR] {datetime.now()} {host} failed {circuit.failures} times, "
+                    f"circuit open for {self.cooldown:.0f}s"
+                )
+
+    def states(self):
+        with self._lock:
+            return {
+                host: {"state": c.state, "failures": c.failures}
+                for host, c in self._circuits.items()
+            }
+
+
+circuit_breaker = HostCircuitBreaker(
+    Config.HTTP_BREAKER_FAILURES, Config.HTTP_BREAKER_COOLDOWN
+)
@@ -1,5 +1,98 @@
 import os
 
+from dotenv import load_dotenv
+
+# Read .env before the class body below evaluates os.getenv
+load_dotenv()
+
 
 class Config:
     DEBUG = False
+
+    # HTTP session used by crawler_helper.scrape_page
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+    HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))
+    HTTP_MAX_CONCURRENCY_PER_HOST = int(os.getenv("HTTP_MAX_CONCURRENCY_PER_HOST", "4"))
+    # On-disk conditional-GET cache shared by workers and CLI runs
+    HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+    HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".http_cache")
+    # Per-host token buckets (requests/sec and burst); HTTP_HOST_RATE_LIMITS
+    # overrides single hosts, e.g. "ipowatch.in=1:3,zerodha.com=4:8"
+    HTTP_DEFAULT_RATE = float(os.getenv("HTTP_DEFAULT_RATE", "4"))
+    HTTP_DEFAULT_BURST = float(os.getenv("HTTP_DEFAULT_BURST", "8"))
+    HTTP_HOST_RATE_LIMITS = os.getenv("HTTP_HOST_RATE_LIMITS", "")
+    # Consecutive failures before a host is short-circuited, and for how
+    # long (seconds); 0 failures disables the breaker
+    HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))
+    HTTP_BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN", "30"))
+    # Append-only archive of every fetched page (re-parse with reparse.py)
+    PAGE_ARCHIVE_ENABLED = (
+        os.getenv("PAGE_ARCHIVE_ENABLED", "true").lower() == "true"
+    )
+    PAGE_ARCHIVE_PATH = os.getenv("PAGE_ARCHIVE_PATH", "page_archive.sqlite3")
+    # Seconds to remember GMP pages that 404 or fail to parse and names
+    # with no GMP match before trying them again
+    NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", "900"))
+    # Parse results kept per URL to skip re-parsing byte-identical pages
+    PARSED_PAGE_CACHE_SIZE = int(os.getenv("PARSED_PAGE_CACHE_SIZE", "512"))
+
+    # Worker threads used to crawl IPO details / GMP pages in parallel
+    CRAWL_MAX_WORKERS = int(os.getenv("CRAWL_MAX_WORKERS", "8"))
+
+    # Response cache for the Flask routes (seconds)
+    CALENDAR_CACHE_TTL = int(os.getenv("CALENDAR_CACHE_TTL", "300"))
+    DETAILS_CACHE_TTL = int(os.getenv("DETAILS_CACHE_TTL", "600"))
+    SUBSCRIPTION_CACHE_TTL = int(os.getenv("SUBSCRIPTION_CACHE_TTL", "60"))
+    CACHE_MAX_STALE = int(os.getenv("CACHE_MAX_STALE", "3600"))
+    # "memory" (per process), "sqlite" (shared by gunicorn workers) or
+    # "module:Class" for a custom CacheBackend
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "response_cache.sqlite3")
+    # Cached responses kept at most; the oldest are dropped first
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "4096"))
+    # Seconds a worker may hold the refresh lock for a key
+    CACHE_LOCK_TTL = int(os.getenv("CACHE_LOCK_TTL", "60"))
+
+    # Opt-in request profiling (send X-Profile: 1 or ?profile=1)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "30"))
+
+    # Incremental CLI crawl (scraper_main --incremental)
+    IPO_STORE_PATH = os.getenv("IPO_STORE_PATH", "ipo_store.sqlite3")
+    INCREMENTAL_MAX_AGE = int(os.getenv("INCREMENTAL_MAX_AGE", str(7 * 24 * 3600)))
+
+    # Persistent IPO name -> GMP URL map (see gmp_url_store.py for overrides)
+    GMP_URL_STORE_ENABLED = (
+        os.getenv("GMP_URL_STORE_ENABLED", "true").lower() == "true"
+    )
+    GMP_URL_STORE_PATH = os.getenv("GMP_URL_STORE_PATH", "gmp_urls.sqlite3")
+
+    # Maximum number of {details_url, gmp_url} pairs per /details/batch call
+    DETAILS_BATCH_MAX = int(os.getenv("DETAILS_BATCH_MAX", "100"))
+    # Latency budget for a /details crawl in milliseconds (0 = no limit);
+    # sections not ready in time are returned as pending
+    DETAILS_DEADLINE_MS = int(os.getenv("DETAILS_DEADLINE_MS", "5000"))
+
+    # Background refresh scheduler (seconds between runs per dataset)
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "false").lower() == "true"
+    CALENDAR_REFRESH_INTERVAL = int(os.getenv("CALENDAR_REFRESH_INTERVAL", "300"))
+    # The details job is a tick: each run only crawls the IPOs that are due
+    DETAILS_REFRESH_INTERVAL = int(os.getenv("DETAILS_REFRESH_INTERVAL", "60"))
+    SUBSCRIPTION_REFRESH_INTERVAL = int(
+        os.getenv("SUBSCRIPTION_REFRESH_INTERVAL", "60")
+    )
+
+    # Per-IPO refresh cadence by phase (listed IPOs are frozen)
+    OPEN_IPO_REFRESH_INTERVAL = int(os.getenv("OPEN_IPO_REFRESH_INTERVAL", "300"))
+    CLOSED_IPO_REFRESH_INTERVAL = int(os.getenv("CLOSED_IPO_REFRESH_INTERVAL", "3600"))
+    UPCOMING_IPO_REFRESH_INTERVAL = int(
+        os.getenv("UPCOMING_IPO_REFRESH_INTERVAL", "3600")
+    )
+    # Upper bound on IPOs crawled per details tick (0 = no limit)
+    DETAILS_MAX_PER_RUN = int(os.getenv("DETAILS_MAX_PER_RUN", "0"))
@@ -1,2 +1,14 @@
-CRAWL_BASE_URL = "https://zerodha.com/"
+import os
+
+# Upstream hosts can be pointed elsewhere (e.g. the load-test stubs)
+CRAWL_BASE_URL = os.getenv("CRAWL_BASE_URL", "https://zerodha.com/")
 CRAWL_HOME_PAGE = "ipo"
+
+IPOWATCH_BASE_URL = os.getenv("IPOWATCH_BASE_URL", "https://ipowatch.in/")
+
+SUBSCRIPTION_URL = os.getenv(
+    "SUBSCRIPTION_URL", "https://ipopremium.in/view/subscription"
+)
+SUBSCRIPTION_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.1.0.000 Safari/537.36"
+}
@@ -1,24 +1,359 @@
+from collections import OrderedDict
+from copy import deepcopy
 from datetime import datetime
+import hashlib
+from threading import BoundedSemaphore, Lock
+import time
+from urllib.parse import urlsplit
 from constants import CRAWL_BASE_URL, CRAWL_HOME_PAGE
+from config import Config
+from circuit_breaker import circuit_breaker
+from http_cache import DiskHttpCache
+from page_archive import PageArchive
+from metrics import metrics
+from rate_limiter import THROTTLE_STATUSES, rate_limiter
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+
+    FAST_PARSER = "lxml"
+except ImportError:
+    FAST_PARSER = "html.parser"
+
+
+# ------------------------------------------------
+#  How a fetched page is turned into a soup
+#  @param parser - BeautifulSoup tree builder ("lxml", "html.parser", ...)
+#  @param parse_only - Optional SoupStrainer limiting the tree to the
+#                      subtrees a parser actually reads
+# ------------------------------------------------
+class ParseStrategy:
+    def __init__(self, parser=FAST_PARSER, parse_only=None):
+        self.parser = parser
+        self.parse_only = parse_only
+
+    def make_soup(self, content):
+        return BeautifulSoup(content, self.parser, parse_only=self.parse_only)
+
+
+# ------------------------------------------------
+#  Function to build a strategy that keeps only the given tags/classes
+#  @param name - Tag name or list of tag names to keep
+#  @param class_ - Optional CSS class or list of classes the tag must carry
+#  @return strategy - ParseStrategy using the fast parser
+# ------------------------------------------------
+def partial_strategy(name, class_=None):
+    if class_ is None:
+        return ParseStrategy(parse_only=SoupStrainer(name))
+    wanted = {class_} if isinstance(class_, str) else set(class_)
+
+    # While parsing, the strainer sees the raw attribute string
+    # ("table-container row"), not the split class list.
+    def has_wanted_class(value):
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return not wanted.isdisjoint(classes)
+
+    return ParseStrategy(parse_only=SoupStrainer(name, class_=has_wanted_class))
+
+
+FULL_PAGE = ParseStrategy(parser="html.parser")
+
+
+# ------------------------------------------------
+#  Raised by fetch_page when its deadline passes before the request is sent
+#  Unlike a failed fetch (None) this says nothing about the page, so callers
+#  report the data as pending rather than missing.
+# ------------------------------------------------
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+# ------------------------------------------------
+#  Raised by scrape_and_parse when the page could not be fetched at all
+#  (connection error, timeout, 5xx or open circuit with no cached copy).
+#  Such a failure is transient, unlike a page that was fetched and turned
+#  out to be missing or empty, so callers should not cache its outcome.
+# ------------------------------------------------
+class FetchFailed(Exception):
+    pass
+
+
+_session = None
+http_cache = DiskHttpCache(Config.HTTP_CACHE_DIR) if Config.HTTP_CACHE_ENABLED else None
+page_archive = (
+    PageArchive(Config.PAGE_ARCHIVE_PATH) if Config.PAGE_ARCHIVE_ENABLED else None
+)
+_session_lock = Lock()
+_host_slots = {}
+_host_slots_lock = Lock()
+
+
+# ------------------------------------------------
+#  Function to build the shared HTTP session
+#  Every host gets its own keep-alive pool (bounded by HTTP_POOL_MAXSIZE)
+#  and 5xx / connection resets are retried with jittered backoff.
+#  gzip/deflate (and br when brotli is installed) are negotiated by requests.
+#  @return session - requests.Session
+# ------------------------------------------------
+def _build_session():
+    retry = Retry(
+        total=Config.HTTP_MAX_RETRIES,
+        connect=Config.HTTP_MAX_RETRIES,
+        read=Config.HTTP_MAX_RETRIES,
+        status=Config.HTTP_MAX_RETRIES,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+        backoff_jitter=Config.HTTP_BACKOFF_JITTER,
+        # urllib3 would sleep out Retry-After (uncapped) while the caller
+        # holds its host slot; the rate limiter honours it for later
+        # requests instead
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+        pool_block=True,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# ------------------------------------------------
+#  Function to get the process wide HTTP session
+#  @return session - requests.Session
+# ------------------------------------------------
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+# ------------------------------------------------
+#  Function to get the concurrency slots for a host
+#  At most HTTP_MAX_CONCURRENCY_PER_HOST requests run against one host at once
+#  @param link - URL being fetched
+#  @return semaphore - BoundedSemaphore for the host of the URL
+# ------------------------------------------------
+def host_slot(link):
+    host = urlsplit(link).netloc
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = BoundedSemaphore(Config.HTTP_MAX_CONCURRENCY_PER_HOST)
+            _host_slots[host] = slot
+    return slot
+
+
+# ------------------------------------------------
+#  Function to fetch the raw body of a page
+#  Goes through the on-disk HTTP cache: fresh entries are served without a
+#  request, stale ones are revalidated with If-None-Match/If-Modified-Since.
+#  Bodies received from the upstream are added to the page archive.
+#  While a host is failing (errors, timeouts, 5xx) the last good cached body
+#  is returned instead, and once its circuit opens no request is made at all.
+#  With a deadline, the fetch is not started once the deadline has passed
+#  (waiting for the rate limiter included) and DeadlineExceeded is raised.
+#  A request already sent runs to completion so its body still reaches the
+#  cache for the next caller.
+#  @param link - URL of the page to fetch
+#  @param headers - Optional headers for the request
+#  @param deadline - Optional time.monotonic() value after which no fetch is started
+#  @return content - Response body bytes, None on failure
+# ------------------------------------------------
+def fetch_page(link, headers=None, deadline=None):
+    host = urlsplit(link).netloc
+    cached = None
+    try:
+        cached = http_cache.load(link) if http_cache else None
+        if cached and cached.is_fresh():
+            return cached.body
+        if deadline is not None and time.monotonic() >= deadline:
+            raise DeadlineExceeded(link)
+
+        if not circuit_breaker.allow(host):
+            metrics.increment(
+                "ipo_upstream_errors_total", host=host, reason="circuit_open"
+            )
+            print(f"[DEBUG] {datetime.now()} {host} circuit open, skipping {link}")
+            return _last_good(link, cached)
+
+        request_headers = dict(headers or {})
+        if cached:
+            request_headers.update(cached.validators())
+        if rate_limiter.acquire(host, deadline) is None:
+            circuit_breaker.release_probe(host)
+            print(f"[DEBUG] {datetime.now()} Deadline passed before fetching {link}")
+            raise DeadlineExceeded(link)
+        with host_slot(link), metrics.timed("ipo_fetch_duration_seconds", host=host):
+            if deadline is not None and time.monotonic() >= deadline:
+                circuit_breaker.release_probe(host)
+                raise DeadlineExceeded(link)
+            r = get_session().get(
+                link,
+                headers=request_headers,
+                timeout=(Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT),
+            )
+        # Let the limiter see throttling answers that urllib3 already retried
+        retries = getattr(r.raw, "retries", None)
+        for attempt in getattr(retries, "history", ()):
+            if attempt.status in THROTTLE_STATUSES:
+                rate_limiter.observe(host, attempt.status)
+        rate_limiter.observe(host, r.status_code, r.headers.get("Retry-After"))
+
+        if r.status_code >= 400:
+            metrics.increment(
+                "ipo_upstream_errors_total", host=host, reason=f"http_{r.status_code}"
+            )
+        if r.status_code >= 500:
+            circuit_breaker.record_failure(host)
+            return _last_good(link, cached)
+        circuit_breaker.record_success(host)
+        if r.status_code == 304 and cached:
+            http_cache.revalidated(link, cached, r.headers)
+            return cached.body
+        if r.status_code == 200 and http_cache:
+            http_cache.store(link, r.headers, r.content)
+        # 404s are kept too: ipowatch's 404 page is what parse_gmp_soup detects
+        if r.status_code in (200, 404) and page_archive:
+            page_archive.append(link, r.status_code, r.content)
+        return r.content
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        circuit_breaker.record_failure(host)
+        metrics.increment(
+            "ipo_upstream_errors_total", host=host, reason=type(e).__name__
+        )
+        print(
+            f"[ERROR] {datetime.now()} Error crawling stock page link - {link} Error - {e}"
+        )
+        return _last_good(link, cached)
+
+
+# ------------------------------------------------
+#  Function to fall back to the last good copy of a page
+#  @param link - URL of the page
+#  @param cached - CachedResponse loaded before the request, or None
+#  @return content - Stale cached body, None when there is none
+# ------------------------------------------------
+def _last_good(link, cached):
+    if cached is None:
+        return None
+    print(f"[DEBUG] {datetime.now()} Serving last good copy of {link}")
+    return cached.body
 
 
 # ------------------------------------------------
 #  Function to scrape a page
 #  @param link - URL of the page to scrape
 #  @param headers - Optional headers for the request
+#  @param strategy - Optional ParseStrategy, defaults to a full html.parser tree
 #  @return soup - BeautifulSoup object
 # ------------------------------------------------
 #
-def scrape_page(link, headers=None):
+def scrape_page(link, headers=None, strategy=None):
+    content = fetch_page(link, headers=headers)
+    if content is None:
+        return None
     try:
-        r = requests.get(link, headers=headers) if headers else requests.get(link)
-        soup = BeautifulSoup(r.content, "html.parser")
-        return soup
+        with metrics.timed(
+            "ipo_parse_duration_seconds", host=urlsplit(link).netloc, parser="soup"
+        ):
+            return (strategy or FULL_PAGE).make_soup(content)
     except Exception as e:
+        metrics.increment("ipo_parse_failures_total", parser="soup")
         print(
             f"[ERROR] {datetime.now()} Error crawling stock page link - {link} Error - {e}"
         )
         return None
+
+
+# ------------------------------------------------
+#  Remembers the last parse result per (URL, parser) with the hash of the
+#  body it came from, so byte-identical pages are not parsed again.
+# ------------------------------------------------
+class ParsedPageCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, digest):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == digest:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, deepcopy(entry[1])
+            self.misses += 1
+            return False, None
+
+    def put(self, key, digest, result):
+        with self._lock:
+            self._entries[key] = (digest, deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+parsed_page_cache = ParsedPageCache(Config.PARSED_PAGE_CACHE_SIZE)
+
+
+# ------------------------------------------------
+#  Function to fetch a page and parse it, skipping the parse when the body
+#  is byte-identical to the previous fetch of the same URL
+#  @param link - URL of the page to scrape
+#  @param parse - Function(soup) returning the extracted data
+#  @param headers - Optional headers for the request
+#  @param strategy - Optional ParseStrategy
+#  @param deadline - Optional time.monotonic() value after which no fetch is started
+#  @return result - Output of parse (a private copy)
+#  Raises DeadlineExceeded when the deadline passed before the fetch, and
+#  FetchFailed when the page could not be fetched
+# ------------------------------------------------
+def scrape_and_parse(link, parse, headers=None, strategy=None, deadline=None):
+    content = fetch_page(link, headers=headers, deadline=deadline)
+    if content is None:
+        raise FetchFailed(link)
+
+    key = (link, parse.__module__, parse.__qualname__)
+    digest = hashlib.blake2b(content, digest_size=16).digest()
+    hit, result = parsed_page_cache.get(key, digest)
+    if hit:
+        return result
+
+    with metrics.timed(
+        "ipo_parse_duration_seconds",
+        host=urlsplit(link).netloc,
+        parser=parse.__name__,
+    ):
+        result = parse((strategy or FULL_PAGE).make_soup(content))
+    parsed_page_cache.put(key, digest, result)
+    return result
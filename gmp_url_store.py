@@ -0,0 +1,167 @@
+from datetime import datetime
+from threading import Lock, local
+import argparse
+import sqlite3
+import time
+
+from config import Config
+from upcoming_ipo_map import NON_ALNUM
+
+MATCHED = "matched"
+OVERRIDE = "override"
+
+
+# ------------------------------------------------
+#  Function to build the lookup key of an IPO name
+#  Only case and punctuation are dropped. Unlike GmpUrlMatcher, stop words
+#  are kept, so "Foo Technologies Ltd" and "Foo Industries Ltd" get
+#  different rows.
+#  @param name - IPO name
+#  @return key - str, empty when the name has no usable tokens
+# ------------------------------------------------
+def name_key(name):
+    return " ".join(token for token in NON_ALNUM.split((name or "").lower()) if token)
+
+
+# ------------------------------------------------
+#  Persistent IPO name -> GMP URL map
+#  An IPO's GMP page does not move once found, so resolved names are kept
+#  across runs and the ipowatch listings only have to be read for new
+#  names. Only exact matches are kept: a weaker match is made again on
+#  every build, so a better listing can still replace it. Manual overrides
+#  win over matched rows and are never replaced by matching.
+# ------------------------------------------------
+class GmpUrlStore:
+    def __init__(self, path=None):
+        self.path = path or Config.GMP_URL_STORE_PATH
+        self._local = local()
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS gmp_urls (
+                name_key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                gmp_url TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                source TEXT NOT NULL,
+                resolved_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------
+    #  Function to look up the GMP URL of an IPO
+    #  @param name - IPO name as listed on the home page
+    #  @return (url, confidence, source) - None when the name is unresolved
+    # ------------------------------------------------
+    def lookup(self, name):
+        key = name_key(name)
+        if not key:
+            return None
+        return (
+            self._conn()
+            .execute(
+                "SELECT gmp_url, confidence, source FROM gmp_urls "
+                "WHERE name_key = ? AND (source = ? OR confidence >= 1.0)",
+                (key, OVERRIDE),
+            )
+            .fetchone()
+        )
+
+    # ------------------------------------------------
+    #  Function to remember a matched GMP URL
+    #  @param name - IPO name
+    #  @param url - GMP URL found by GmpUrlMatcher
+    #  @param confidence - Match confidence; below 1.0 nothing is stored
+    # ------------------------------------------------
+    def save(self, name, url, confidence):
+        key = name_key(name)
+        if not key or not url or confidence < 1.0:
+            return
+        self._conn().execute(
+            """
+            INSERT INTO gmp_urls (name_key, name, gmp_url, confidence, source, resolved_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(name_key) DO UPDATE SET
+                name = excluded.name,
+                gmp_url = excluded.gmp_url,
+                confidence = excluded.confidence,
+                resolved_at = excluded.resolved_at
+            WHERE gmp_urls.source != ?
+            """,
+            (key, name, url, confidence, MATCHED, time.time(), OVERRIDE),
+        )
+
+    def set_override(self, name, url):
+        key = name_key(name)
+        if not key:
+            raise ValueError(f"No usable words in IPO name {name!r}")
+        self._conn().execute(
+            """
+            INSERT OR REPLACE INTO gmp_urls
+                (name_key, name, gmp_url, confidence, source, resolved_at)
+            VALUES (?, ?, ?, 1.0, ?, ?)
+            """,
+            (key, name, url.strip(), OVERRIDE, time.time()),
+        )
+
+    def remove(self, name):
+        self._conn().execute(
+            "DELETE FROM gmp_urls WHERE name_key = ?", (name_key(name),)
+        )
+
+    def rows(self):
+        return self._conn().execute(
+            "SELECT name, gmp_url, confidence, source, resolved_at "
+            "FROM gmp_urls ORDER BY resolved_at DESC"
+        ).fetchall()
+
+
+_store = None
+_store_lock = Lock()
+
+
+# ------------------------------------------------
+#  Function to get the process wide GMP URL store
+#  @return store - GmpUrlStore, None when GMP_URL_STORE_ENABLED is off
+# ------------------------------------------------
+def get_gmp_url_store():
+    global _store
+    if not Config.GMP_URL_STORE_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = GmpUrlStore()
+    return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the IPO name -> GMP URL map")
+    parser.add_argument("--store", default=Config.GMP_URL_STORE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Show all resolved names")
+    override = commands.add_parser("override", help="Pin a name to a GMP URL")
+    override.add_argument("name")
+    override.add_argument("url")
+    remove = commands.add_parser("remove", help="Forget a name")
+    remove.add_argument("name")
+    args = parser.parse_args()
+
+    store = GmpUrlStore(args.store)
+    if args.command == "override":
+        store.set_override(args.name, args.url)
+    elif args.command == "remove":
+        store.remove(args.name)
+    else:
+        for name, url, confidence, source, resolved_at in store.rows():
+            print(
+                f"{name}\t{url}\t{confidence}\t{source}\t"
+                f"{datetime.fromtimestamp(resolved_at).isoformat(timespec='seconds')}"
+            )
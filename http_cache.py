@@ -0,0 +1,126 @@
+from datetime import datetime
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+# ------------------------------------------------
+#  A cached response: validators, freshness lifetime and body
+# ------------------------------------------------
+class CachedResponse:
+    def __init__(self, meta, body):
+        self.meta = meta
+        self.body = body
+
+    def is_fresh(self):
+        return time.time() - self.meta["storedAt"] < self.meta["maxAge"]
+
+    def validators(self):
+        headers = {}
+        if self.meta.get("etag"):
+            headers["If-None-Match"] = self.meta["etag"]
+        if self.meta.get("lastModified"):
+            headers["If-Modified-Since"] = self.meta["lastModified"]
+        return headers
+
+
+# ------------------------------------------------
+#  Function to read the freshness lifetime from Cache-Control
+#  @param headers - Response headers
+#  @return max_age - Seconds, or None when the response must not be stored
+# ------------------------------------------------
+def _max_age(headers):
+    cache_control = (headers.get("Cache-Control") or "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    match = MAX_AGE.search(cache_control)
+    return int(match.group(1)) if match else 0
+
+
+# ------------------------------------------------
+#  On-disk HTTP cache for upstream pages
+#  One file per URL holding a JSON metadata line followed by the body.
+#  Files are replaced atomically, so gunicorn workers and CLI runs can
+#  share the same directory.
+# ------------------------------------------------
+class DiskHttpCache:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, url):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    # ------------------------------------------------
+    #  Function to load the cached response for a URL
+    #  @param url - Page URL
+    #  @return cached - CachedResponse or None
+    # ------------------------------------------------
+    def load(self, url):
+        try:
+            with open(self._path(url), "rb") as f:
+                meta_line, body = f.read().split(b"\n", 1)
+            meta = json.loads(meta_line)
+            if meta.get("url") != url:
+                return None
+            return CachedResponse(meta, body)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[DEBUG] {datetime.now()} Ignoring unreadable HTTP cache entry for {url}: {e}")
+            return None
+
+    # ------------------------------------------------
+    #  Function to store a 200 response
+    #  @param url - Page URL
+    #  @param headers - Response headers
+    #  @param body - Response body bytes
+    # ------------------------------------------------
+    def store(self, url, headers, body):
+        max_age = _max_age(headers)
+        if max_age is None:
+            return
+        # Even without validators or a freshness lifetime the entry is kept
+        # as the last good copy to serve while the host is failing
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "lastModified": headers.get("Last-Modified"),
+            "maxAge": max_age,
+            "storedAt": time.time(),
+        }
+        self._write(url, meta, body)
+
+    # ------------------------------------------------
+    #  Function to record a 304 revalidation
+    #  @param url - Page URL
+    #  @param cached - CachedResponse that was revalidated
+    #  @param headers - 304 response headers
+    # ------------------------------------------------
+    def revalidated(self, url, cached, headers):
+        meta = dict(cached.meta)
+        meta["storedAt"] = time.time()
+        max_age = _max_age(headers)
+        if max_age is not None and headers.get("Cache-Control"):
+            meta["maxAge"] = max_age
+        meta["etag"] = headers.get("ETag") or meta.get("etag")
+        meta["lastModified"] = headers.get("Last-Modified") or meta.get("lastModified")
+        self._write(url, meta, cached.body)
+
+    def _write(self, url, meta, body):
+        path = self._path(url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n" + body)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[DEBUG] {datetime.now()} Error writing HTTP cache entry for {url}: {e}")
@@ -0,0 +1,127 @@
+from datetime import datetime
+import json
+import sqlite3
+import time
+
+from config import Config
+from refresh_priority import LISTED, ipo_phase
+
+# Fields of a record filled by the details/GMP crawl rather than the calendar,
+# including the markers of sections that failed or were still pending
+CRAWLED_FIELDS = ("details", "gmpTimeline", "ipoDetails", "failed", "pending")
+
+
+# ------------------------------------------------
+#  Persistent per-IPO store used by incremental crawls
+#  One row per IPO keyed by its details URL, holding the merged calendar +
+#  details/GMP record and the time it was last crawled.
+# ------------------------------------------------
+class IpoStore:
+    def __init__(self, path=None):
+        self.path = path or Config.IPO_STORE_PATH
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ipos (
+                details_url TEXT PRIMARY KEY,
+                gmp_url TEXT,
+                record TEXT NOT NULL,
+                crawled_at REAL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def get(self, details_url):
+        row = self._conn.execute(
+            "SELECT gmp_url, record, crawled_at FROM ipos WHERE details_url = ?",
+            (details_url,),
+        ).fetchone()
+        if row is None:
+            return None
+        gmp_url, record, crawled_at = row
+        return {"gmpUrl": gmp_url, "record": json.loads(record), "crawledAt": crawled_at}
+
+    # ------------------------------------------------
+    #  Function to decide whether an IPO has to be crawled again
+    #  @param stock - Calendar entry
+    #  @param max_age - Seconds after which stored data is considered old
+    #  @return bool - True for new IPOs, IPOs whose GMP link changed, IPOs
+    #                 that have not listed yet, and stale rows
+    # ------------------------------------------------
+    def needs_refresh(self, stock, max_age):
+        stored = self.get(stock.get("link"))
+        if stored is None or stored["crawledAt"] is None:
+            return True
+        if stored["gmpUrl"] != stock.get("gmpUrl"):
+            return True
+        if ipo_phase(stock) != LISTED:
+            return True
+        return time.time() - stored["crawledAt"] > max_age
+
+    # ------------------------------------------------
+    #  Function to upsert an IPO
+    #  @param stock - Merged calendar + details record
+    #  @param crawled - True when the details/GMP data was just fetched;
+    #                   False only refreshes the calendar fields and keeps
+    #                   the stored details/GMP data (also after a failed crawl)
+    # ------------------------------------------------
+    def save(self, stock, crawled=True):
+        details_url = stock.get("link")
+        if not details_url:
+            return
+        if crawled:
+            record, crawled_at = stock, time.time()
+        else:
+            stored = self.get(details_url)
+            record = {**stored["record"], **stock} if stored else stock
+            if stored:
+                for field in CRAWLED_FIELDS:
+                    if field in stored["record"]:
+                        record[field] = stored["record"][field]
+                    else:
+                        record.pop(field, None)
+            crawled_at = stored["crawledAt"] if stored else None
+        self._conn.execute(
+            """
+            INSERT INTO ipos (details_url, gmp_url, record, crawled_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(details_url) DO UPDATE SET
+                gmp_url = excluded.gmp_url,
+                record = excluded.record,
+                crawled_at = excluded.crawled_at
+            """,
+            (details_url, stock.get("gmpUrl"), json.dumps(record), crawled_at),
+        )
+        # Commit per IPO so an interrupted run keeps everything crawled so far
+        self._conn.commit()
+
+    # ------------------------------------------------
+    #  Function to get the stored record for a calendar entry
+    #  @param stock - Calendar entry
+    #  @return record - Stored record, or the entry itself when not stored
+    # ------------------------------------------------
+    def record_for(self, stock):
+        stored = self.get(stock.get("link"))
+        return stored["record"] if stored else stock
+
+
+# ------------------------------------------------
+#  Function to split a calendar into IPOs to crawl and IPOs to keep
+#  @param store - IpoStore
+#  @param stocks - Calendar entries
+#  @param max_age - Seconds after which stored data is considered old
+#  @return (to_crawl, fresh) - Lists of calendar entries
+# ------------------------------------------------
+def plan_incremental_crawl(store, stocks, max_age):
+    to_crawl, fresh = [], []
+    for stock in stocks:
+        (to_crawl if store.needs_refresh(stock, max_age) else fresh).append(stock)
+    print(
+        f"[DEBUG] {datetime.now()} Incremental crawl: {len(to_crawl)} to crawl, "
+        f"{len(fresh)} up to date"
+    )
+    return to_crawl, fresh
@@ -0,0 +1,208 @@
+"""
+End-to-end load test against local stub upstreams.
+
+Starts the stub upstreams, starts app.py (Flask dev server or gunicorn)
+pointed at them, drives /calendar, /details and /subscription at the
+given concurrency and reports throughput and p50/p95/p99 latency.
+
+    python -m loadtest.run_load --server gunicorn --workers 4 \\
+        --concurrency 32 --duration 30 --latency-ms 150 --error-rate 0.02
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from loadtest.stub_upstream import StubSettings, StubUpstreams
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return True
+        except requests.RequestException:
+            time.sleep(0.2)
+    return False
+
+
+# ------------------------------------------------
+#  Function to start app.py in a subprocess
+#  @param server - "flask" or "gunicorn"
+#  @param port - Port to listen on
+#  @param workers - gunicorn worker count
+#  @param env - Extra environment variables
+#  @return process - subprocess.Popen
+# ------------------------------------------------
+def start_app(server, port, workers, env):
+    if server == "gunicorn":
+        command = [
+            sys.executable, "-m", "gunicorn",
+            "-w", str(workers),
+            "--threads", "4",
+            "-b", f"127.0.0.1:{port}",
+            "app:app",
+        ]
+    else:
+        command = [
+            sys.executable, "-m", "flask",
+            "--app", "app",
+            "run", "--port", str(port), "--no-reload", "--with-threads",
+        ]
+    return subprocess.Popen(
+        command,
+        cwd=REPO_ROOT,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+# ------------------------------------------------
+#  Function to drive the API for a fixed duration
+#  @param base_url - App base URL
+#  @param mix - List of (endpoint, params) choices, picked at random
+#  @param concurrency - Number of client threads
+#  @param duration - Seconds to run
+#  @return samples - Dict of endpoint -> list of (latency, ok)
+# ------------------------------------------------
+def drive(base_url, mix, concurrency, duration):
+    deadline = time.monotonic() + duration
+
+    def client(_):
+        session = requests.Session()
+        samples = []
+        while time.monotonic() < deadline:
+            endpoint, params = random.choice(mix)
+            started = time.perf_counter()
+            try:
+                ok = session.get(base_url + endpoint, params=params, timeout=60).ok
+            except requests.RequestException:
+                ok = False
+            samples.append((endpoint, time.perf_counter() - started, ok))
+        return samples
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for samples in executor.map(client, range(concurrency)):
+            for endpoint, latency, ok in samples:
+                results.setdefault(endpoint, []).append((latency, ok))
+    return results
+
+
+def report(results, duration):
+    print(
+        f"\n{'endpoint':<16}{'requests':>10}{'errors':>8}{'req/s':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for endpoint, samples in sorted(results.items()):
+        latencies = [latency * 1000 for latency, _ in samples]
+        errors = sum(1 for _, ok in samples if not ok)
+        print(
+            f"{endpoint:<16}{len(samples):>10}{errors:>8}{len(samples) / duration:>9.1f}"
+            f"{percentile(latencies, 50):>10.1f}{percentile(latencies, 95):>10.1f}"
+            f"{percentile(latencies, 99):>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test app.py against stub upstreams")
+    parser.add_argument("--server", choices=["flask", "gunicorn"], default="flask")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--ipos", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--endpoints",
+        default="calendar,details,subscription",
+        help="Comma separated endpoints to drive",
+    )
+    parser.add_argument(
+        "--app-env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Extra environment for the app (e.g. CALENDAR_CACHE_TTL=0)",
+    )
+    args = parser.parse_args()
+
+    stubs = StubUpstreams(
+        StubSettings(args.ipos, args.latency_ms, args.jitter_ms, args.error_rate)
+    ).start()
+    env = stubs.env()
+    # Everything the app writes to disk lives in a temp dir removed at the
+    # end: runs stay independent of caches left by earlier runs, resolved GMP
+    # URLs (the stubs get new ports every run) do not outlive the run, and
+    # synthetic pages stay out of the real page archive
+    store_dir = tempfile.mkdtemp(prefix="loadtest_")
+    env["HTTP_CACHE_DIR"] = os.path.join(store_dir, "http_cache")
+    env["GMP_URL_STORE_PATH"] = os.path.join(store_dir, "gmp_urls.sqlite3")
+    env["PAGE_ARCHIVE_PATH"] = os.path.join(store_dir, "page_archive.sqlite3")
+    env.update(item.split("=", 1) for item in args.app_env)
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}/"
+    app = start_app(args.server, port, args.workers, env)
+    try:
+        if not _wait_for(base_url + "status", 30):
+            sys.exit("app did not start")
+
+        endpoints = args.endpoints.split(",")
+        mix = []
+        if "calendar" in endpoints:
+            mix.append(("calendar", None))
+        if "subscription" in endpoints:
+            mix.append(("subscription", None))
+        if "details" in endpoints:
+            calendar = requests.get(base_url + "calendar", timeout=120).json()
+            for stock in calendar:
+                mix.append(
+                    (
+                        "details",
+                        {"details_url": stock["link"], "gmp_url": stock["gmpUrl"]},
+                    )
+                )
+
+        print(
+            f"Driving {', '.join(endpoints)} on {args.server} at concurrency "
+            f"{args.concurrency} for {args.duration}s"
+        )
+        report(drive(base_url, mix, args.concurrency, args.duration), args.duration)
+    finally:
+        app.terminate()
+        app.wait()
+        stubs.stop()
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Local stand-ins for zerodha.com, ipowatch.in and ipopremium.in.
+
+Each upstream runs as its own HTTP server (so per-host limits behave as
+in production) and serves pages from benchmarks.fixtures, optionally
+slowed down and failing at a configured rate.
+
+    python -m loadtest.stub_upstream --ipos 40 --latency-ms 150 --error-rate 0.02
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+import argparse
+import random
+import re
+import time
+
+from benchmarks import fixtures
+
+GMP_PATH = re.compile(r"^/(company-[a-z]\d+)-ipo-gmp-grey-market-premium/?$")
+DETAILS_PATH = re.compile(r"^/ipo/(\d+)/[^/]+/?$")
+
+
+class StubSettings:
+    def __init__(self, ipos=40, latency_ms=0, jitter_ms=0, error_rate=0.0):
+        self.ipos = ipos
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+
+def _make_handler(routes, settings):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            delay = settings.latency_ms + random.uniform(0, settings.jitter_ms)
+            if delay:
+                time.sleep(delay / 1000)
+            if random.random() < settings.error_rate:
+                return self._send(503, b"stub upstream error")
+            status, body = routes(self.path.split("?")[0])
+            self._send(status, body)
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+# ------------------------------------------------
+#  Stub servers for the three upstreams
+#  @param settings - StubSettings
+#  @param host - Interface to bind
+# ------------------------------------------------
+class StubUpstreams:
+    def __init__(self, settings, host="127.0.0.1"):
+        self.settings = settings
+        self.host = host
+        self._servers = {}
+
+    def start(self):
+        for name in ("zerodha", "ipowatch", "ipopremium"):
+            server = ThreadingHTTPServer((self.host, 0), None)
+            server.daemon_threads = True
+            self._servers[name] = server
+        # Pages link to each other, so render them once every port is known
+        pages = self._render_pages()
+        for name, server in self._servers.items():
+            server.RequestHandlerClass = _make_handler(
+                self._router(name, pages), self.settings
+            )
+            Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def base_url(self, name):
+        return f"http://{self.host}:{self._servers[name].server_address[1]}/"
+
+    # ------------------------------------------------
+    #  Function to get the environment pointing the app at the stubs
+    #  @return env - Dict of constants.py overrides
+    # ------------------------------------------------
+    def env(self):
+        return {
+            "CRAWL_BASE_URL": self.base_url("zerodha"),
+            "IPOWATCH_BASE_URL": self.base_url("ipowatch"),
+            "SUBSCRIPTION_URL": self.base_url("ipopremium") + "view/subscription",
+        }
+
+    def _render_pages(self):
+        ipos = self.settings.ipos
+        mainboard = ipos - ipos // 4
+        return {
+            "home": fixtures.home_page(ipos, self.base_url("zerodha")).encode(),
+            "details": fixtures.details_page().encode(),
+            "mainboard": fixtures.listing_page(
+                mainboard, self.base_url("ipowatch")
+            ).encode(),
+            "sme": fixtures.listing_page(
+                ipos - mainboard, self.base_url("ipowatch"), start=mainboard
+            ).encode(),
+            "gmp": fixtures.gmp_page(20).encode(),
+            "not_found": fixtures.gmp_not_found_page().encode(),
+            "subscription": fixtures.subscription_page(max(1, ipos // 8)).encode(),
+        }
+
+    def _router(self, name, pages):
+        def zerodha(path):
+            if path.rstrip("/") == "/ipo":
+                return 200, pages["home"]
+            if DETAILS_PATH.match(path):
+                return 200, pages["details"]
+            return 404, b"not found"
+
+        def ipowatch(path):
+            if path == "/upcoming-ipo-calendar-ipo-list/":
+                return 200, pages["mainboard"]
+            if path == "/upcoming-sme-ipo-calendar-list/":
+                return 200, pages["sme"]
+            if GMP_PATH.match(path):
+                return 200, pages["gmp"]
+            return 404, pages["not_found"]
+
+        def ipopremium(path):
+            if path == "/view/subscription":
+                return 200, pages["subscription"]
+            return 404, b"not found"
+
+        return {"zerodha": zerodha, "ipowatch": ipowatch, "ipopremium": ipopremium}[
+            name
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve stub upstream pages")
+    parser.add_argument("--ipos", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stubs = StubUpstreams(
+        StubSettings(args.ipos, args.latency_ms, args.jitter_ms, args.error_rate)
+    ).start()
+    for key, value in stubs.env().items():
+        print(f"{key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stubs.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+from threading import Lock
+import time
+
+# Histogram buckets in seconds, spanning in-memory hits to slow upstream fetches
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HELP = {
+    "ipo_fetch_duration_seconds": "Time spent fetching upstream pages",
+    "ipo_parse_duration_seconds": "Time spent building soups and extracting data",
+    "ipo_name_match_duration_seconds": "Time spent matching stock names to GMP URLs",
+    "ipo_serialization_duration_seconds": "Time spent serializing responses",
+    "ipo_request_duration_seconds": "Time spent serving API requests",
+    "ipo_upstream_errors_total": "Failed upstream fetches",
+    "ipo_parse_failures_total": "Pages or blocks that could not be parsed",
+}
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+# ------------------------------------------------
+#  Process-wide counters and histograms rendered in Prometheus text format
+#  Each gunicorn worker keeps its own registry.
+# ------------------------------------------------
+class MetricsRegistry:
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = Lock()
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timed(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    # ------------------------------------------------
+    #  Function to render every metric in Prometheus exposition format
+    #  @return text - str
+    # ------------------------------------------------
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, list(h.counts), h.total, h.sum)
+                for key, h in self._histograms.items()
+            )
+
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), counts, total, total_sum in histograms:
+            header(name, "histogram")
+            for bound, count in zip(BUCKETS, counts):
+                lines.append(f"{name}_bucket{_labels(labels, le=bound)} {count}")
+            lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {total}')
+            lines.append(f"{name}_sum{_labels(labels)} {total_sum:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {total}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = MetricsRegistry()
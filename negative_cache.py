@@ -0,0 +1,58 @@
+from threading import Lock
+import time
+
+from config import Config
+
+
+# ------------------------------------------------
+#  Remembers lookups known to come back empty (GMP URLs serving the 404
+#  page, pages that failed to parse, names with no GMP match) for `ttl`
+#  seconds, so they are not fetched or matched again in the meantime.
+#  Kept separate from the response cache so misses expire much sooner
+#  than good data does.
+# ------------------------------------------------
+class NegativeCache:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = Lock()
+        self.hits = 0
+
+    # ------------------------------------------------
+    #  Function to check for a remembered miss
+    #  @param kind - Namespace of the key ("gmp", "match", ...)
+    #  @param key - URL or name looked up
+    #  @return reason - Reason recorded with add(), None when not cached
+    # ------------------------------------------------
+    def get(self, kind, key):
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                return None
+            reason, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[(kind, key)]
+                return None
+            self.hits += 1
+            return reason
+
+    def add(self, kind, key, reason):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[(kind, key)] = (reason, time.monotonic() + self.ttl)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            counts = {}
+            for (kind, _), (reason, expires_at) in self._entries.items():
+                if expires_at > now:
+                    label = f"{kind}:{reason}"
+                    counts[label] = counts.get(label, 0) + 1
+            return {"entries": counts, "hits": self.hits, "ttl": self.ttl}
+
+
+negative_cache = NegativeCache(Config.NEGATIVE_CACHE_TTL)
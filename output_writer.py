@@ -0,0 +1,89 @@
+from datetime import datetime
+import json
+import os
+import uuid
+
+
+# ------------------------------------------------
+#  Writes one JSON record per line, flushing after each record so that
+#  everything written so far survives a crash later in the run
+# ------------------------------------------------
+class JsonLinesWriter:
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "w")
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _iter_json_lines(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# Reads {"index", "record"} lines in index order. Only the line offsets are
+# held in memory; each record is read back when its turn comes.
+def _iter_indexed_json_lines(path):
+    offsets = []
+    with open(path, "rb") as f:
+        position = 0
+        for line in f:
+            if line.strip():
+                offsets.append((json.loads(line)["index"], position))
+            position += len(line)
+        offsets.sort()
+        for _, position in offsets:
+            f.seek(position)
+            yield json.loads(f.readline())["record"]
+
+
+# ------------------------------------------------
+#  Function to turn a JSON Lines file into a JSON array file atomically
+#  Records are streamed one at a time into a temp file next to the target,
+#  which then replaces the target, so readers never see a partial array.
+#  The layout matches json.dumps(records, indent=indent).
+#  @param jsonl_path - Source JSON Lines file
+#  @param json_path - Target JSON file
+#  @param indent - Indentation used for the array
+#  @param indexed - Source lines are {"index", "record"} objects written in
+#                   any order; the array holds the records in index order
+# ------------------------------------------------
+def jsonl_to_json_array(jsonl_path, json_path, indent=2, indexed=False):
+    # A plain open() keeps the umask-default permissions that mkstemp's
+    # 0600 would take away from the published file
+    tmp_path = f"{os.path.abspath(json_path)}.{uuid.uuid4().hex}.tmp"
+    pad = " " * indent
+    try:
+        with open(tmp_path, "x") as out:
+            out.write("[")
+            first = True
+            records = (
+                _iter_indexed_json_lines(jsonl_path)
+                if indexed
+                else _iter_json_lines(jsonl_path)
+            )
+            for record in records:
+                body = json.dumps(record, indent=indent).replace("\n", "\n" + pad)
+                out.write(("\n" if first else ",\n") + pad + body)
+                first = False
+            out.write("]" if first else "\n]")
+        os.replace(tmp_path, json_path)
+    except Exception as e:
+        os.unlink(tmp_path)
+        print(f"[ERROR] {datetime.now()} Error writing {json_path}: {e}")
+        raise
@@ -0,0 +1,146 @@
+from datetime import datetime
+from threading import local
+import hashlib
+import sqlite3
+import time
+import zlib
+
+
+# ------------------------------------------------
+#  One archived fetch
+# ------------------------------------------------
+class ArchivedPage:
+    __slots__ = ("id", "url", "fetched_at", "status", "body")
+
+    def __init__(self, id, url, fetched_at, status, body):
+        self.id = id
+        self.url = url
+        self.fetched_at = fetched_at
+        self.status = status
+        self.body = body
+
+
+# ------------------------------------------------
+#  Append-only archive of raw upstream pages
+#  Every body fetched from an upstream is stored zlib-compressed in SQLite
+#  (WAL, so gunicorn workers and CLI runs can append at the same time),
+#  indexed by URL and fetch time. Rows are only ever inserted; a body
+#  identical to the latest copy of its URL is not stored again.
+#  Parsers can then be re-run over the archive (see reparse.py) and its
+#  pages used as benchmark input, without touching the upstreams.
+# ------------------------------------------------
+class PageArchive:
+    def __init__(self, path):
+        self.path = path
+        self._local = local()
+
+    # The database is opened on first use, so importing the fetch layer
+    # does not create an archive file
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    status INTEGER NOT NULL,
+                    digest BLOB NOT NULL,
+                    body BLOB NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS pages_url_time ON pages (url, fetched_at)"
+            )
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------
+    #  Function to archive a fetched page
+    #  Never raises: a failing archive must not fail the fetch.
+    #  @param url - Page URL
+    #  @param status - HTTP status code
+    #  @param body - Response body bytes
+    #  @return stored - True when a new row was written
+    # ------------------------------------------------
+    def append(self, url, status, body):
+        try:
+            digest = hashlib.blake2b(body, digest_size=16).digest()
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                latest = conn.execute(
+                    "SELECT digest FROM pages WHERE url = ? "
+                    "ORDER BY fetched_at DESC LIMIT 1",
+                    (url,),
+                ).fetchone()
+                if latest is not None and latest[0] == digest:
+                    return False
+                conn.execute(
+                    "INSERT INTO pages (url, fetched_at, status, digest, body) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, time.time(), status, digest, zlib.compress(body, 6)),
+                )
+                return True
+            finally:
+                conn.execute("COMMIT")
+        except Exception as e:
+            print(f"[DEBUG] {datetime.now()} Error archiving page {url}: {e}")
+            return False
+
+    # ------------------------------------------------
+    #  Function to list archived fetches
+    #  @param latest_only - Only the most recent fetch of each URL
+    #  @param since - Optional epoch seconds; older fetches are skipped
+    #  @return entries - List of (id, url, fetched_at) ordered by id
+    # ------------------------------------------------
+    def entries(self, latest_only=True, since=None):
+        query = "SELECT id, url, fetched_at FROM pages"
+        if latest_only:
+            query += (
+                " WHERE id IN (SELECT id FROM pages AS p WHERE p.url = pages.url"
+                " ORDER BY fetched_at DESC LIMIT 1)"
+            )
+        params = ()
+        if since is not None:
+            query += " AND" if latest_only else " WHERE"
+            query += " fetched_at >= ?"
+            params = (since,)
+        return self._conn().execute(query + " ORDER BY id", params).fetchall()
+
+    # ------------------------------------------------
+    #  Function to read archived pages
+    #  @param ids - Row ids from entries()
+    #  @return generator - ArchivedPage with the decompressed body
+    # ------------------------------------------------
+    def read(self, ids):
+        conn = self._conn()
+        for page_id in ids:
+            row = conn.execute(
+                "SELECT id, url, fetched_at, status, body FROM pages WHERE id = ?",
+                (page_id,),
+            ).fetchone()
+            if row is not None:
+                yield ArchivedPage(*row[:4], zlib.decompress(row[4]))
+
+    # ------------------------------------------------
+    #  Function to summarise the archive for /status
+    #  @return stats - Page and URL counts and compressed size, or the error
+    # ------------------------------------------------
+    def stats(self):
+        try:
+            pages, urls, stored_bytes = (
+                self._conn()
+                .execute(
+                    "SELECT COUNT(*), COUNT(DISTINCT url), SUM(LENGTH(body)) FROM pages"
+                )
+                .fetchone()
+            )
+        except Exception as e:
+            return {"error": str(e)}
+        return {"pages": pages, "urls": urls, "compressedBytes": stored_bytes or 0}
@@ -1,22 +1,46 @@
-from crawler_helper import scrape_page
+from crawler_helper import (
+    DeadlineExceeded,
+    FetchFailed,
+    partial_strategy,
+    scrape_and_parse,
+)
 from datetime import datetime
 from helper import convert_gmp_date
+from metrics import metrics
+from negative_cache import negative_cache
 import re
 
+# The GMP page is read through its wp-block-table figures and the page
+# heading (used to detect ipowatch's 404 page)
+GMP_PAGE_STRATEGY = partial_strategy(
+    ["figure", "h1"], class_=["wp-block-table", "elementor-heading-title"]
+)
+
+
+class GmpPageNotFound(Exception):
+    pass
+
 
 # ------------------------------------------------
 # Function to get GMP timeline for a stock
 # @param gmp_url - URL of the GMP page
-# @return stock_data - GMP data object
+# @param deadline - Optional time.monotonic() value after which no fetch is started
+# @return stock_data - GMP data object, None when the page is missing or
+#                      could not be parsed
+# Raises DeadlineExceeded when the deadline passed before the fetch, and
+# FetchFailed when the page could not be fetched
 # ------------------------------------------------
-def get_gmp_timeline(gmp_url):
+def get_gmp_timeline(gmp_url, deadline=None):
     try:
         if not gmp_url:
             print(f"[DEBUG] {datetime.now()} No GMP URL found")
             return None
         else:
-            return parse_gmp_page(gmp_url)
+            return parse_gmp_page(gmp_url, deadline)
+    except (DeadlineExceeded, FetchFailed):
+        raise
     except Exception as e:
+        metrics.increment("ipo_parse_failures_total", parser="parse_gmp_soup")
         print(f"[DEBUG] {datetime.now()} Error parsing GMP timeline for {gmp_url}")
         print(e)
         return None
@@ -46,6 +70,7 @@ def _parse_gmp_timeline(data):
             gmp_timeline.append({"date": convert_gmp_date(date), "price": gmp_cleaned})
         return gmp_timeline
     except Exception as e:
+        metrics.increment("ipo_parse_failures_total", parser="_parse_gmp_timeline")
         print(f"[DEBUG] {datetime.now()} Error parsing GMP timeline: {e}")
         return []
 
@@ -131,6 +156,7 @@ def _parse_ipo_details(data):
                     )
         return details
     except Exception as e:
+        metrics.increment("ipo_parse_failures_total", parser="_parse_ipo_details")
         print(f"[DEBUG] {datetime.now()} Error parsing IPO details from GMP page: {e}")
         return None
 
@@ -138,17 +164,46 @@ def _parse_ipo_details(data):
 #  ------------------------------------------------
 #  Function to parse GMP page
 #  @param gmp_url - URL of the GMP page
+#  @param deadline - Optional time.monotonic() value after which no fetch is started
+#  @return stock_data - GMP data object
+#  ------------------------------------------------
+def parse_gmp_page(gmp_url, deadline=None):
+    known_miss = negative_cache.get("gmp", gmp_url)
+    if known_miss:
+        print(f"[DEBUG] {datetime.now()} Skipping gmp page ({known_miss}): {gmp_url}")
+        return None
+    try:
+        gmp_data = scrape_and_parse(
+            gmp_url, parse_gmp_soup, strategy=GMP_PAGE_STRATEGY, deadline=deadline
+        )
+    except GmpPageNotFound:
+        negative_cache.add("gmp", gmp_url, "not_found")
+        return None
+    except (DeadlineExceeded, FetchFailed):
+        raise
+    except Exception:
+        negative_cache.add("gmp", gmp_url, "parse_failure")
+        raise
+    if not gmp_data:
+        print(f"[DEBUG] {datetime.now()} No GMP data scraped from gmp page: {gmp_url}")
+        return None
+    return gmp_data
+
+
+#  ------------------------------------------------
+#  Function to extract GMP data from a GMP page
+#  @param data - BeautifulSoup object of the page
 #  @return stock_data - GMP data object
+#  Raises GmpPageNotFound for ipowatch's 404 page
 #  ------------------------------------------------
-def parse_gmp_page(gmp_url):
-    data = scrape_page(gmp_url)
+def parse_gmp_soup(data):
     if not data:
-        print(f"[DEBUG] {datetime.now()} No Data Error scraping gmp page: {gmp_url}")
+        print(f"[DEBUG] {datetime.now()} No Data Error scraping gmp page")
         return None
     is_error = data.find("h1", class_="elementor-heading-title").text.strip()
     if is_error == "404":
-        print(f"[DEBUG] {datetime.now()} 404 Error scraping gmp page: {gmp_url}")
-        return None
+        print(f"[DEBUG] {datetime.now()} 404 Error scraping gmp page")
+        raise GmpPageNotFound()
 
     gmp_data = {}
     gmp_data["gmpTimeline"] = _parse_gmp_timeline(data)
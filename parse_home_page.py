@@ -1,4 +1,6 @@
 from constants import CRAWL_BASE_URL
+from crawler_helper import partial_strategy
+from metrics import metrics
 from helper import (
     convert_to_slug,
     parse_symbol,
@@ -7,6 +9,11 @@ from helper import (
     process_price_range,
 )
 
+# Only the desktop tables and the mobile cards are read from the home page
+HOME_PAGE_STRATEGY = partial_strategy(
+    "div", class_=["table-container", "show-on-mobile"]
+)
+
 
 def collect_all_ipo_rows(html_content):
     """
@@ -76,5 +83,6 @@ def parse_home_page(home_page_html):
             stock_data.append(stock_info)
         return stock_data
     except Exception as e:
+        metrics.increment("ipo_parse_failures_total", parser="parse_home_page")
         print(f"Error parsing home page: {e}")
         return None
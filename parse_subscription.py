@@ -1,5 +1,10 @@
 from datetime import datetime
 import re
+from crawler_helper import partial_strategy
+from metrics import metrics
+
+# Every IPO on the subscription page sits in its own div.watermark block
+SUBSCRIPTION_PAGE_STRATEGY = partial_strategy("div", class_="watermark")
 
 
 def parse_subscription_page(soup):
@@ -10,6 +15,7 @@ def parse_subscription_page(soup):
             ipo = parse_ipo_block(block)
             ipos.append(ipo)
         except Exception as e:
+            metrics.increment("ipo_parse_failures_total", parser="parse_ipo_block")
             print(f"[ERROR] Error parsing IPO block: {e}")
             continue
     return ipos
@@ -1,4 +1,10 @@
-from crawler_helper import scrape_page
+from crawler_helper import (
+    DeadlineExceeded,
+    FetchFailed,
+    ParseStrategy,
+    scrape_and_parse,
+)
+from metrics import metrics
 from helper import (
     parse_schedule_date,
     convert_to_slug,
@@ -9,19 +15,48 @@ from helper import (
 
 import re
 
+# Strengths / risks are located with find_next() from their headings, which
+# needs the whole document, so only the parser backend is swapped here.
+DETAILS_PAGE_STRATEGY = ParseStrategy()
+
 
-def get_full_ipo_details(details_url):
+# ------------------------------------------------
+#  Function to get the IPO details from a zerodha IPO page
+#  @param details_url - zerodha IPO page URL
+#  @param deadline - Optional time.monotonic() value after which no fetch is started
+#  @return data - IPO details object, None when the page could not be parsed
+#  Raises DeadlineExceeded when the deadline passed before the fetch, and
+#  FetchFailed when the page could not be fetched
+# ------------------------------------------------
+def get_full_ipo_details(details_url, deadline=None):
     try:
-        return process_individual_stock(details_url)
+        return process_individual_stock(details_url, deadline)
+    except (DeadlineExceeded, FetchFailed):
+        raise
     except Exception as e:
+        metrics.increment(
+            "ipo_parse_failures_total", parser="parse_individual_stock_page"
+        )
         print(f"Error reading individual stock data for {details_url}")
         print(e)
         return None
 
 
-def process_individual_stock(details_url):
-    link = details_url
-    data = scrape_page(link)
+def process_individual_stock(details_url, deadline=None):
+    return scrape_and_parse(
+        details_url,
+        parse_individual_stock_page,
+        strategy=DETAILS_PAGE_STRATEGY,
+        deadline=deadline,
+    )
+
+
+# ------------------------------------------------
+#  Function to extract the IPO details from a zerodha IPO page
+#  @param data - BeautifulSoup object of the page
+#  @return data - IPO details object
+# ------------------------------------------------
+def parse_individual_stock_page(data):
     ipo_meta = data.find("div", class_="ipo-meta")
 
     listing_date = (
@@ -0,0 +1,151 @@
+from datetime import datetime
+from threading import Lock
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+
+# Functions called out separately in every report: label -> predicate on
+# the pstats key (filename, line, function name)
+HIGHLIGHTS = {
+    "soup construction": lambda f, _, n: n == "__init__" and f.endswith(
+        os.path.join("bs4", "__init__.py")
+    ),
+    "find_all / find": lambda f, _, n: n in ("find_all", "find")
+    and "bs4" in f,
+    "strptime": lambda f, _, n: "strptime" in n,
+    "regex": lambda f, _, n: f.endswith("re/__init__.py") or "method 're.Pattern" in n,
+    "name matching": lambda f, _, n: f.endswith("upcoming_ipo_map.py")
+    and n in ("match", "__init__", "get_urls_by_names"),
+}
+
+_active = Lock()
+
+
+# ------------------------------------------------
+#  Profiles a block of work, including threads started while it runs
+#  Only one profiling session runs at a time; a second one is skipped
+#  (check `.active`). Threads started by other work during the session
+#  are profiled too, so use it on a quiet process when possible.
+# ------------------------------------------------
+class Profiler:
+    def __init__(self, label):
+        self.label = label
+        self.active = False
+        self._profiler = cProfile.Profile()
+        self._thread_profilers = []
+        self._stats = None
+
+    def _profile_new_thread(self, *args):
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread from the main profiler
+            return
+        self._thread_profilers.append(profiler)
+
+    def start(self):
+        if not _active.acquire(blocking=False):
+            return self
+        self.active = True
+        threading.setprofile(self._profile_new_thread)
+        self._profiler.enable()
+        return self
+
+    def stop(self):
+        if not self.active:
+            return self
+        self._profiler.disable()
+        threading.setprofile(None)
+        self._stats = pstats.Stats(self._profiler)
+        for profiler in self._thread_profilers:
+            try:
+                self._stats.add(profiler)
+            except Exception as e:
+                print(f"[DEBUG] {datetime.now()} Skipping thread profile: {e}")
+        self.active = False
+        _active.release()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------
+    #  Function to rank the hottest functions
+    #  @param top_n - Number of functions to return
+    #  @param sort - pstats sort key ("tottime" or "cumulative")
+    #  @return rows - List of dicts, hottest first
+    # ------------------------------------------------
+    def hot_functions(self, top_n=30, sort="tottime"):
+        if self._stats is None:
+            return []
+        index = {"tottime": 2, "cumulative": 3}[sort]
+        ranked = sorted(
+            self._stats.stats.items(), key=lambda item: item[1][index], reverse=True
+        )
+        return [
+            {
+                "function": f"{os.path.basename(file)}:{line}({name})",
+                "calls": calls,
+                "tottime": round(tottime, 6),
+                "cumtime": round(cumtime, 6),
+            }
+            for (file, line, name), (_, calls, tottime, cumtime, _) in ranked[:top_n]
+        ]
+
+    # ------------------------------------------------
+    #  Function to total the time spent in the HIGHLIGHTS groups
+    #  Cumulative time, so groups may overlap (find_all inside strptime
+    #  callers etc.)
+    #  @return totals - Dict of label -> {"calls", "cumtime"}
+    # ------------------------------------------------
+    def highlights(self):
+        totals = {label: {"calls": 0, "cumtime": 0.0} for label in HIGHLIGHTS}
+        if self._stats is None:
+            return totals
+        for (file, line, name), (_, calls, _, cumtime, _) in self._stats.stats.items():
+            for label, predicate in HIGHLIGHTS.items():
+                if predicate(file, line, name):
+                    totals[label]["calls"] += calls
+                    totals[label]["cumtime"] += cumtime
+        for total in totals.values():
+            total["cumtime"] = round(total["cumtime"], 6)
+        return totals
+
+    def report(self, top_n=30):
+        out = io.StringIO()
+        out.write(f"Profile: {self.label}\n\nHighlights (cumulative time):\n")
+        for label, total in self.highlights().items():
+            out.write(f"  {label:<20}{total['cumtime']:>10.4f}s {total['calls']:>8} calls\n")
+        out.write("\nHot functions:\n")
+        if self._stats is not None:
+            self._stats.stream = out
+            self._stats.sort_stats("tottime").print_stats(top_n)
+        return out.getvalue()
+
+    # ------------------------------------------------
+    #  Function to save the raw profile and the text report
+    #  @param directory - Output directory
+    #  @param top_n - Number of functions in the text report
+    #  @return path - Path of the text report
+    # ------------------------------------------------
+    def save(self, directory, top_n=30):
+        os.makedirs(directory, exist_ok=True)
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{_slug(self.label)}"
+        if self._stats is not None:
+            self._stats.dump_stats(os.path.join(directory, name + ".prof"))
+        path = os.path.join(directory, name + ".txt")
+        with open(path, "w") as f:
+            f.write(self.report(top_n))
+        return path
+
+
+def _slug(label):
+    return "".join(c if c.isalnum() else "-" for c in label).strip("-")[:60]
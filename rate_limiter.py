@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+import time
+
+from config import Config
+
+# Statuses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+# ------------------------------------------------
+#  Function to parse the host limits from config
+#  @param spec - "host=rate:burst,host=rate:burst" (rate in requests/sec)
+#  @return limits - Dict of host -> (rate, burst)
+# ------------------------------------------------
+def parse_host_limits(spec):
+    limits = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        host, _, value = item.strip().partition("=")
+        rate, _, burst = value.partition(":")
+        limits[host] = (float(rate), float(burst or rate))
+    return limits
+
+
+# ------------------------------------------------
+#  Function to read a Retry-After header
+#  @param value - Header value (seconds or HTTP date)
+#  @return seconds - Seconds to wait, None when missing or invalid
+# ------------------------------------------------
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Bucket:
+    def __init__(self, rate, burst):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+
+# ------------------------------------------------
+#  Per-host token buckets
+#  An idle host has a full bucket, so requests go out immediately; under
+#  load each host is held to its configured rate. On 429/503 the host's
+#  rate is halved and any Retry-After is honoured; every successful
+#  response wins back a tenth of the configured rate.
+# ------------------------------------------------
+class HostRateLimiter:
+    MIN_RATE = 0.05
+
+    def __init__(self, default_rate, default_burst, host_limits=None):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.host_limits = host_limits or {}
+        self._buckets = {}
+        self._lock = Lock()
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate, burst = self.host_limits.get(
+                host, (self.default_rate, self.default_burst)
+            )
+            bucket = self._buckets[host] = _Bucket(rate, burst)
+        return bucket
+
+    # ------------------------------------------------
+    #  Function to wait for a request slot on a host
+    #  @param host - Host name (netloc)
+    #  @param deadline - Optional time.monotonic() value to give up at
+    #  @return waited - Seconds spent waiting, None if the deadline came first
+    # ------------------------------------------------
+    def acquire(self, host, deadline=None):
+        waited = 0.0
+        while True:
+            with self._lock:
+                bucket = self._bucket(host)
+                now = time.monotonic()
+                bucket.tokens = min(
+                    bucket.burst, bucket.tokens + (now - bucket.updated) * bucket.rate
+                )
+                bucket.updated = now
+                if now >= bucket.blocked_until and bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return waited
+                delay = max(
+                    bucket.blocked_until - now, (1 - bucket.tokens) / bucket.rate
+                )
+            if deadline is not None and now + delay > deadline:
+                return None
+            time.sleep(delay)
+            waited += delay
+
+    # ------------------------------------------------
+    #  Function to adapt a host's rate to a response
+    #  @param host - Host name (netloc)
+    #  @param status - HTTP status code
+    #  @param retry_after - Optional Retry-After header value
+    # ------------------------------------------------
+    def observe(self, host, status, retry_after=None):
+        with self._lock:
+            bucket = self._bucket(host)
+            if status in THROTTLE_STATUSES:
+                bucket.rate = max(self.MIN_RATE, bucket.rate / 2)
+                bucket.tokens = min(bucket.tokens, 0)
+                wait = parse_retry_after(retry_after)
+                if wait:
+                    bucket.blocked_until = max(
+                        bucket.blocked_until, time.monotonic() + wait
+                    )
+                print(
+                    f"[DEBUG] {datetime.now()} {host} answered {status}, "
+                    f"rate lowered to {bucket.rate:.2f}/s"
+                    + (f", retrying after {wait:.0f}s" if wait else "")
+                )
+            elif status < 400 and bucket.rate < bucket.base_rate:
+                bucket.rate = min(bucket.base_rate, bucket.rate + bucket.base_rate / 10)
+
+    def rates(self):
+        with self._lock:
+            return {host: round(b.rate, 3) for host, b in self._buckets.items()}
+
+
+rate_limiter = HostRateLimiter(
+    Config.HTTP_DEFAULT_RATE,
+    Config.HTTP_DEFAULT_BURST,
+    parse_host_limits(Config.HTTP_HOST_RATE_LIMITS),
+)
@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+from threading import Lock
+import time
+
+from config import Config
+
+OPEN = "open"
+CLOSED = "closed"
+UPCOMING = "upcoming"
+LISTED = "listed"
+
+# Lower rank is crawled first
+PHASE_RANK = {OPEN: 0, CLOSED: 1, UPCOMING: 2, LISTED: 3}
+
+
+def _parse_iso(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+# ------------------------------------------------
+#  Function to work out where an IPO is in its life cycle
+#  Uses the startDate / endDate / listingDate fields from parse_home_page.
+#  @param stock - Calendar entry
+#  @param now - Optional aware datetime (defaults to current UTC time)
+#  @return phase - OPEN, CLOSED (awaiting listing), UPCOMING or LISTED
+# ------------------------------------------------
+def ipo_phase(stock, now=None):
+    now = now or datetime.now(timezone.utc)
+    start = _parse_iso(stock.get("startDate"))
+    end = _parse_iso(stock.get("endDate"))
+    listing = _parse_iso(stock.get("listingDate"))
+
+    if listing and now >= listing:
+        return LISTED
+    if end and now > end:
+        return CLOSED
+    if start and now >= start:
+        return OPEN
+    return UPCOMING
+
+
+# ------------------------------------------------
+#  Function to get the refresh cadence of a phase
+#  @param phase - Phase from ipo_phase
+#  @return seconds - Seconds between refreshes, None when frozen
+# ------------------------------------------------
+def refresh_interval(phase):
+    return {
+        OPEN: Config.OPEN_IPO_REFRESH_INTERVAL,
+        CLOSED: Config.CLOSED_IPO_REFRESH_INTERVAL,
+        UPCOMING: Config.UPCOMING_IPO_REFRESH_INTERVAL,
+        LISTED: None,
+    }[phase]
+
+
+# ------------------------------------------------
+#  Tracks when each IPO was last refreshed and hands out the ones due
+#  Listed IPOs are crawled once and then frozen; everything else is due
+#  again after its phase's interval. Due IPOs come back ordered by phase
+#  (open first) and then by how overdue they are.
+#  With a CacheBackend the refresh times are shared, so whichever worker
+#  runs the crawl skips what another worker refreshed.
+# ------------------------------------------------
+class PriorityRefreshQueue:
+    def __init__(self, backend=None, backend_key="refresh-queue:details"):
+        self._last_refreshed = {}
+        self._lock = Lock()
+        self._backend = backend
+        self._backend_key = backend_key
+
+    def _load_shared(self):
+        entry = self._backend.get(self._backend_key) if self._backend else None
+        if entry is not None:
+            for key, refreshed_at in entry[0].items():
+                if refreshed_at > self._last_refreshed.get(key, 0):
+                    self._last_refreshed[key] = refreshed_at
+
+    # ------------------------------------------------
+    #  Function to get the IPOs due for a refresh
+    #  @param stocks - Iterable of (key, stock) pairs
+    #  @param limit - Optional cap on the number returned
+    #  @return due - List of (key, stock, phase) in crawl order
+    # ------------------------------------------------
+    def due(self, stocks, limit=None):
+        now = datetime.now(timezone.utc)
+        clock = time.time()
+        ranked = []
+        with self._lock:
+            self._load_shared()
+            for key, stock in stocks:
+                phase = ipo_phase(stock, now)
+                last = self._last_refreshed.get(key)
+                if last is None:
+                    overdue = float("inf")
+                else:
+                    interval = refresh_interval(phase)
+                    if interval is None:
+                        continue
+                    overdue = clock - last - interval
+                    if overdue < 0:
+                        continue
+                ranked.append((PHASE_RANK[phase], -overdue, key, stock, phase))
+
+        ranked.sort(key=lambda item: item[:3])
+        if limit:
+            ranked = ranked[:limit]
+        return [(key, stock, phase) for _, _, key, stock, phase in ranked]
+
+    def mark_refreshed(self, key):
+        with self._lock:
+            self._load_shared()
+            self._last_refreshed[key] = time.time()
+            if self._backend:
+                self._backend.set(self._backend_key, self._last_refreshed)
@@ -0,0 +1,160 @@
+"""
+Bulk re-parse of the raw page archive.
+
+Runs the current parsers over archived pages in a process pool (one
+worker per core by default) and writes one JSON line per page, so a
+parser change can be backfilled at CPU speed without re-crawling.
+
+    python reparse.py --kind gmp --output gmp_backfill.jsonl
+    python reparse.py --all-versions --since 2024-10-01
+"""
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urlsplit
+import argparse
+import os
+import time
+
+from config import Config
+from constants import (
+    CRAWL_BASE_URL,
+    CRAWL_HOME_PAGE,
+    IPOWATCH_BASE_URL,
+    SUBSCRIPTION_URL,
+)
+from output_writer import JsonLinesWriter
+from page_archive import PageArchive
+from parse_gmp import GMP_PAGE_STRATEGY, GmpPageNotFound, parse_gmp_soup
+from parse_home_page import HOME_PAGE_STRATEGY, parse_home_page
+from parse_subscription import SUBSCRIPTION_PAGE_STRATEGY, parse_subscription_page
+from process_individual_stock import DETAILS_PAGE_STRATEGY, parse_individual_stock_page
+from upcoming_ipo_map import (
+    LISTING_PAGE_STRATEGY,
+    UPCOMING_IPO,
+    UPCOMING_SME_IPO,
+    parse_ipo_listing_page,
+)
+
+# kind -> (strategy, parse function)
+PARSERS = {
+    "home": (HOME_PAGE_STRATEGY, parse_home_page),
+    "details": (DETAILS_PAGE_STRATEGY, parse_individual_stock_page),
+    "gmp": (GMP_PAGE_STRATEGY, parse_gmp_soup),
+    "listing": (LISTING_PAGE_STRATEGY, parse_ipo_listing_page),
+    "subscription": (SUBSCRIPTION_PAGE_STRATEGY, parse_subscription_page),
+}
+
+
+# ------------------------------------------------
+#  Function to find which parser reads a page
+#  @param url - Page URL
+#  @return kind - Key of PARSERS, None for pages no parser reads
+# ------------------------------------------------
+def classify_url(url):
+    if url == CRAWL_BASE_URL + CRAWL_HOME_PAGE:
+        return "home"
+    if url == SUBSCRIPTION_URL:
+        return "subscription"
+    if url in (UPCOMING_IPO, UPCOMING_SME_IPO):
+        return "listing"
+    host = urlsplit(url).netloc
+    if host == urlsplit(IPOWATCH_BASE_URL).netloc:
+        return "gmp"
+    if host == urlsplit(CRAWL_BASE_URL).netloc:
+        return "details"
+    return None
+
+
+# ------------------------------------------------
+#  Function to parse one batch of archived pages (runs in a worker process)
+#  @param archive_path - Path of the page archive
+#  @param ids - Archive row ids
+#  @return records - One {"url", "fetchedAt", "kind", "data"|"error"} per page
+# ------------------------------------------------
+def reparse_batch(archive_path, ids):
+    records = []
+    for page in PageArchive(archive_path).read(ids):
+        kind = classify_url(page.url)
+        record = {"url": page.url, "fetchedAt": page.fetched_at, "kind": kind}
+        strategy, parse = PARSERS[kind]
+        try:
+            record["data"] = parse(strategy.make_soup(page.body))
+        except GmpPageNotFound:
+            record["error"] = "not_found"
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        records.append(record)
+    return records
+
+
+# ------------------------------------------------
+#  Function to plan a re-parse
+#  @param archive - PageArchive
+#  @param kinds - Parser kinds to include (None for all)
+#  @param latest_only - Only the latest fetch of each URL
+#  @param since - Optional epoch seconds
+#  @return ids - Archive row ids of the pages to parse
+# ------------------------------------------------
+def select_pages(archive, kinds=None, latest_only=True, since=None):
+    ids = []
+    for page_id, url, _ in archive.entries(latest_only, since):
+        kind = classify_url(url)
+        if kind is not None and (not kinds or kind in kinds):
+            ids.append(page_id)
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-run the parsers over the page archive"
+    )
+    parser.add_argument("--archive", default=Config.PAGE_ARCHIVE_PATH)
+    parser.add_argument("--kind", action="append", choices=sorted(PARSERS))
+    parser.add_argument(
+        "--all-versions",
+        action="store_true",
+        help="Parse every archived fetch, not just the latest one per URL",
+    )
+    parser.add_argument("--since", help="Only fetches on or after this ISO date/time")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--output", default="reparsed.jsonl")
+    args = parser.parse_args()
+
+    since = datetime.fromisoformat(args.since).timestamp() if args.since else None
+    ids = select_pages(
+        PageArchive(args.archive), args.kind, not args.all_versions, since
+    )
+    size = args.batch_size
+    batches = [ids[i : i + size] for i in range(0, len(ids), size)]
+    print(
+        f"[DEBUG] {datetime.now()} Re-parsing {len(ids)} pages in {len(batches)} "
+        f"batches on {args.workers} processes"
+    )
+
+    started = time.perf_counter()
+    outcomes = Counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor, JsonLinesWriter(
+        args.output
+    ) as writer:
+        futures = [
+            executor.submit(reparse_batch, args.archive, batch) for batch in batches
+        ]
+        for future in as_completed(futures):
+            for record in future.result():
+                writer.write(record)
+                outcomes[(record["kind"], "error" in record)] += 1
+
+    elapsed = time.perf_counter() - started
+    for (kind, failed), count in sorted(outcomes.items()):
+        print(f"{kind:<14}{'failed' if failed else 'parsed':<8}{count:>8}")
+    print(
+        f"{writer.count} pages written to {args.output} in {elapsed:.2f}s "
+        f"({writer.count / elapsed if elapsed else 0:.0f} pages/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+from datetime import datetime
+from threading import Lock, Thread
+import time
+
+from cache_backend import MemoryCacheBackend
+from config import Config
+
+# How often a worker waiting on another worker's load polls the backend
+WAIT_POLL_INTERVAL = 0.1
+
+
+# ------------------------------------------------
+#  TTL cache with stale-while-revalidate over a CacheBackend
+#  Entries younger than `ttl` are served as HIT. Entries older than `ttl`
+#  but younger than `ttl + max_stale` are served as STALE while a single
+#  background thread reloads them. Anything older is a MISS and is
+#  loaded in the calling thread.
+#  Entries are stored to expire after `ttl + max_stale`, when they can no
+#  longer be served.
+#  Loads take the backend's lock for the key, so with a shared backend
+#  only one worker process refreshes a key at a time; the others serve
+#  stale data or wait for the lock holder's result.
+# ------------------------------------------------
+class ResponseCache:
+    def __init__(self, backend=None, lock_ttl=60):
+        self.backend = backend or MemoryCacheBackend(Config.CACHE_MAX_ENTRIES)
+        self.lock_ttl = lock_ttl
+        self._refreshing = set()
+        self._lock = Lock()
+
+    # ------------------------------------------------
+    #  Function to get a value, loading it when needed
+    #  @param key - Cache key (endpoint + query args)
+    #  @param loader - Zero-argument function producing the value; raising
+    #                  or returning None means the value is not cached
+    #  @param ttl - Seconds the value is considered fresh
+    #  @param max_stale - Seconds past ttl the value may still be served
+    #  @param cacheable - Optional predicate; values it rejects (e.g. partial
+    #                     results) are returned but not stored
+    #  @return (value, state, age) - state is HIT, STALE or MISS
+    # ------------------------------------------------
+    def get(self, key, loader, ttl, max_stale, cacheable=None):
+        entry = self.backend.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = max(0.0, time.time() - stored_at)
+            if age < ttl:
+                return value, "HIT", age
+            if age < ttl + max_stale:
+                self._refresh_in_background(key, loader, ttl + max_stale, cacheable)
+                return value, "STALE", age
+
+        token = self.backend.try_lock(key, self.lock_ttl)
+        if token is None:
+            # Another worker is loading this key: wait for its result, or
+            # for the lock when it gives up without storing one
+            shared, token = self._wait_for(key, newer_than=entry[1] if entry else 0)
+            if shared is not None:
+                return shared[0], "HIT", max(0.0, time.time() - shared[1])
+        try:
+            value = loader()
+            if _storable(value, cacheable):
+                self.backend.set(key, value, ttl + max_stale)
+        finally:
+            if token is not None:
+                self.backend.unlock(key, token)
+        return value, "MISS", 0.0
+
+    def _wait_for(self, key, newer_than):
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_POLL_INTERVAL)
+            entry = self.backend.get(key)
+            if entry is not None and entry[1] > newer_than:
+                return entry, None
+            token = self.backend.try_lock(key, self.lock_ttl)
+            if token is not None:
+                return None, token
+        return None, None
+
+    def _refresh_in_background(self, key, loader, expire_after, cacheable=None):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            token = None
+            try:
+                token = self.backend.try_lock(key, self.lock_ttl)
+                if token is None:
+                    return
+                value = loader()
+                if _storable(value, cacheable):
+                    self.backend.set(key, value, expire_after)
+            except Exception as e:
+                print(f"[ERROR] {datetime.now()} Error refreshing cache key {key}: {e}")
+            finally:
+                if token is not None:
+                    self.backend.unlock(key, token)
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        Thread(target=refresh, daemon=True).start()
+
+
+def _storable(value, cacheable):
+    return value is not None and (cacheable is None or cacheable(value))
+
+
+# ------------------------------------------------
+#  Function to build a cache key from an endpoint and its query args
+#  @param endpoint - Route name
+#  @param args - Mapping of query args
+#  @return key - str
+# ------------------------------------------------
+def make_cache_key(endpoint, args=None):
+    if not args:
+        return endpoint
+    query = "&".join(f"{k}={args[k]}" for k in sorted(args) if args[k] is not None)
+    return f"{endpoint}?{query}"
@@ -0,0 +1,286 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from threading import Event, Lock, Thread
+from types import MappingProxyType
+import json
+import time
+
+from config import Config
+from metrics import metrics
+from refresh_priority import PriorityRefreshQueue
+from response_cache import make_cache_key
+from scraper_main import (
+    details_crawl_failed,
+    get_all_ipo_listing_with_gmp_link,
+    get_stock_details_and_gmp_from_symbol,
+    get_subscription_listing,
+)
+
+
+# ------------------------------------------------
+#  Immutable result of one dataset refresh
+#  @param data - Parsed data (treat as read-only)
+#  @param payloads - Read-only mapping of key -> serialized JSON; plain
+#                    datasets use the key None
+#  @param published_at - UTC datetime the snapshot was published
+# ------------------------------------------------
+class Snapshot:
+    __slots__ = ("data", "payloads", "published_at")
+
+    def __init__(self, data, keyed=False, name=None, published_at=None):
+        self.data = data
+        with metrics.timed("ipo_serialization_duration_seconds", endpoint=name):
+            if keyed:
+                payloads = {key: json.dumps(value) for key, value in data.items()}
+            else:
+                payloads = {None: json.dumps(data)}
+        self.payloads = MappingProxyType(payloads)
+        self.published_at = published_at or datetime.now(timezone.utc)
+
+    def get(self, key=None):
+        return self.payloads.get(key)
+
+    def age(self):
+        return (datetime.now(timezone.utc) - self.published_at).total_seconds()
+
+
+class _Job:
+    def __init__(self, name, interval, fn, keyed, triggers):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.keyed = keyed
+        self.triggers = triggers
+        self.wake = Event()
+        self.status = {
+            "interval": interval,
+            "running": False,
+            "lastRunAt": None,
+            "lastDuration": None,
+            "lastSuccess": None,
+            "lastError": None,
+            "lastSuccessAt": None,
+            "source": None,
+        }
+
+
+# ------------------------------------------------
+#  Periodically refreshes datasets in background threads
+#  Each registered job runs on its own thread every `interval` seconds (or
+#  sooner when triggered) and publishes a new Snapshot when it returns
+#  data. A job returning None or raising keeps the previous snapshot.
+#  With a shared CacheBackend, published data is also written to the
+#  backend; a worker whose dataset is already fresh there (or whose
+#  refresh lock is held by another worker) adopts that data instead of
+#  crawling, so the crawl runs once per interval however many workers
+#  there are.
+# ------------------------------------------------
+class RefreshScheduler:
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._jobs = {}
+        self._snapshots = {}
+        self._lock = Lock()
+        self._stop = Event()
+        self._threads = []
+
+    # ------------------------------------------------
+    #  Function to register a dataset
+    #  @param name - Dataset name
+    #  @param interval - Seconds between refreshes
+    #  @param fn - Function(scheduler) returning the new data or None
+    #  @param keyed - True when fn returns a dict of key -> value
+    #  @param triggers - Dataset names to refresh right after this one publishes
+    # ------------------------------------------------
+    def register(self, name, interval, fn, keyed=False, triggers=()):
+        self._jobs[name] = _Job(name, interval, fn, keyed, tuple(triggers))
+
+    def snapshot(self, name):
+        with self._lock:
+            return self._snapshots.get(name)
+
+    def status(self):
+        with self._lock:
+            return {name: dict(job.status) for name, job in self._jobs.items()}
+
+    def trigger(self, name):
+        self._jobs[name].wake.set()
+
+    # ------------------------------------------------
+    #  Function to run one dataset refresh in the calling thread
+    #  @param name - Dataset name
+    #  @return success - True when a new snapshot was published
+    # ------------------------------------------------
+    def run_now(self, name):
+        job = self._jobs[name]
+        if self._backend is None:
+            return self._run(job)
+        if self._adopt_shared(job):
+            return True
+        token = self._backend.try_lock(
+            f"refresh:{name}", max(job.interval, Config.CACHE_LOCK_TTL)
+        )
+        if token is None:
+            # Another worker is refreshing; take whatever it last published
+            return self._adopt_shared(job, any_age=True)
+        try:
+            return self._run(job)
+        finally:
+            self._backend.unlock(f"refresh:{name}", token)
+
+    # ------------------------------------------------
+    #  Function to use the copy of a dataset published by another worker
+    #  @param job - _Job
+    #  @param any_age - Adopt even if older than the job interval
+    #  @return adopted - True when a shared copy is now the local snapshot
+    # ------------------------------------------------
+    def _adopt_shared(self, job, any_age=False):
+        entry = self._backend.get(f"snapshot:{job.name}")
+        if entry is None:
+            return False
+        data, stored_at = entry
+        if not any_age and time.time() - stored_at >= job.interval:
+            return False
+        published_at = datetime.fromtimestamp(stored_at, timezone.utc)
+        current = self.snapshot(job.name)
+        if current is not None and current.published_at >= published_at:
+            return True
+        snapshot = Snapshot(data, job.keyed, job.name, published_at)
+        with self._lock:
+            self._snapshots[job.name] = snapshot
+            job.status.update(
+                lastSuccessAt=published_at.isoformat(), source="shared"
+            )
+        for dependent in job.triggers:
+            self.trigger(dependent)
+        return True
+
+    def _run(self, job):
+        name = job.name
+        with self._lock:
+            job.status["running"] = True
+        started = time.monotonic()
+        started_at = datetime.now(timezone.utc).isoformat()
+        error = None
+        data = None
+        try:
+            data = job.fn(self)
+            if data is None:
+                error = "no data returned"
+        except Exception as e:
+            error = str(e)
+            print(f"[ERROR] {datetime.now()} Scheduled refresh of {name} failed: {e}")
+
+        snapshot = Snapshot(data, keyed=job.keyed, name=name) if error is None else None
+        if snapshot is not None and self._backend is not None:
+            self._backend.set(f"snapshot:{name}", data)
+        with self._lock:
+            if snapshot is not None:
+                self._snapshots[name] = snapshot
+                job.status["lastSuccessAt"] = started_at
+                job.status["source"] = "local"
+            job.status.update(
+                running=False,
+                lastRunAt=started_at,
+                lastDuration=round(time.monotonic() - started, 3),
+                lastSuccess=error is None,
+                lastError=error,
+            )
+
+        if snapshot is not None:
+            for dependent in job.triggers:
+                self.trigger(dependent)
+        return snapshot is not None
+
+    def _loop(self, job):
+        while not self._stop.is_set():
+            self.run_now(job.name)
+            job.wake.wait(job.interval)
+            job.wake.clear()
+
+    def start(self):
+        for job in self._jobs.values():
+            thread = Thread(
+                target=self._loop, args=(job,), name=f"refresh-{job.name}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for job in self._jobs.values():
+            job.wake.set()
+
+
+# ------------------------------------------------
+#  Function to crawl details + GMP for the IPOs in the calendar snapshot
+#  Only IPOs the priority queue reports as due are crawled (open IPOs
+#  first); everything else is carried over from the previous snapshot.
+#  @param scheduler - RefreshScheduler
+#  @param queue - PriorityRefreshQueue tracking per-IPO refresh times
+#  @return details - Dict of /details cache key -> details payload, or None
+# ------------------------------------------------
+def refresh_details(scheduler, queue):
+    calendar = scheduler.snapshot("calendar")
+    if calendar is None:
+        return None
+
+    stocks = []
+    for stock in calendar.data:
+        args = {"details_url": stock.get("link"), "gmp_url": stock.get("gmpUrl")}
+        stocks.append((make_cache_key("details", args), stock))
+    due = queue.due(stocks, limit=Config.DETAILS_MAX_PER_RUN)
+
+    previous = scheduler.snapshot("details")
+    details = {
+        key: previous.data[key]
+        for key, _ in stocks
+        if previous is not None and key in previous.data
+    }
+
+    def crawl(item):
+        key, stock, phase = item
+        print(f"[DEBUG] {datetime.now()} Refreshing {phase} IPO {stock.get('name')}")
+        return key, stock, get_stock_details_and_gmp_from_symbol(
+            stock.get("link"), stock.get("gmpUrl")
+        )
+
+    # executor.map submits in queue order, so open IPOs get workers first
+    with ThreadPoolExecutor(max_workers=Config.CRAWL_MAX_WORKERS) as executor:
+        for key, stock, result in executor.map(crawl, due):
+            # A failed crawl keeps the previous entry and stays due
+            if details_crawl_failed(result):
+                print(f"[ERROR] {datetime.now()} Refresh failed for {stock.get('name')}")
+                continue
+            details[key] = result
+            queue.mark_refreshed(key)
+    return details
+
+
+# ------------------------------------------------
+#  Function to build the scheduler for the calendar, details and
+#  subscription datasets using the intervals from config.Config
+#  @param backend - Optional shared CacheBackend (see RefreshScheduler)
+#  @return scheduler - RefreshScheduler (not started)
+# ------------------------------------------------
+def build_default_scheduler(backend=None):
+    scheduler = RefreshScheduler(backend)
+    scheduler.register(
+        "calendar",
+        Config.CALENDAR_REFRESH_INTERVAL,
+        lambda _: get_all_ipo_listing_with_gmp_link() or None,
+        triggers=("details",),
+    )
+    scheduler.register(
+        "details",
+        Config.DETAILS_REFRESH_INTERVAL,
+        partial(refresh_details, queue=PriorityRefreshQueue(backend)),
+        keyed=True,
+    )
+    scheduler.register(
+        "subscription",
+        Config.SUBSCRIPTION_REFRESH_INTERVAL,
+        lambda _: get_subscription_listing(),
+    )
+    return scheduler
@@ -1,13 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from copy import deepcopy
 from datetime import datetime
-import json
-from time import sleep
-from constants import CRAWL_BASE_URL, CRAWL_HOME_PAGE
-from crawler_helper import scrape_page
-from helper import extract_names, write_json
+from threading import Lock
+import argparse
+import os
+import time
+from config import Config
+from constants import (
+    CRAWL_BASE_URL,
+    CRAWL_HOME_PAGE,
+    SUBSCRIPTION_HEADERS,
+    SUBSCRIPTION_URL,
+)
+from crawler_helper import (
+    DeadlineExceeded,
+    FetchFailed,
+    parsed_page_cache,
+    scrape_page,
+)
+from helper import extract_names
+from ipo_store import IpoStore, plan_incremental_crawl
+from metrics import metrics
+from output_writer import JsonLinesWriter, jsonl_to_json_array
+from profiling import Profiler
 from parse_gmp import get_gmp_timeline
-from parse_home_page import parse_home_page
+from parse_home_page import HOME_PAGE_STRATEGY, parse_home_page
+from parse_subscription import SUBSCRIPTION_PAGE_STRATEGY, parse_subscription_page
 from process_individual_stock import get_full_ipo_details
-from upcoming_ipo_map import get_gmp_url_for_stocks, get_urls_by_names
+from single_flight import coalesce
+from gmp_url_store import get_gmp_url_store
+from negative_cache import negative_cache
+from upcoming_ipo_map import GmpUrlMatcher, fetch_gmp_listings
+
+# Whether the last calendar build had names the GMP URL store could not
+# resolve. Such names (weak matches are never stored) usually come back, so
+# the next build fetches the listings alongside the home page again.
+_listings_needed = True
 
 # ------------------------------------------------
 #  Function to get all IPO listing with GMP link
@@ -15,11 +43,23 @@ from upcoming_ipo_map import get_gmp_url_for_stocks, get_urls_by_names
 # ------------------------------------------------
 
 
+@coalesce
 def get_all_ipo_listing_with_gmp_link():
-    # Fetch the table which has all the stock data
-    home_page_html = scrape_page(CRAWL_BASE_URL + CRAWL_HOME_PAGE)
-    # Parse the table to get all the stock data
-    all_stocks_from_table = parse_home_page(home_page_html)
+    global _listings_needed
+    store = get_gmp_url_store()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Without a GMP URL store every build needs the ipowatch listings,
+        # and with one they are likely needed when the last build needed
+        # them, so fetch them while the home page loads
+        gmp_urls_future = (
+            executor.submit(fetch_gmp_listings)
+            if store is None or _listings_needed
+            else None
+        )
+        # Fetch and parse the table which has all the stock data
+        all_stocks_from_table = parse_home_page(
+            scrape_page(CRAWL_BASE_URL + CRAWL_HOME_PAGE, strategy=HOME_PAGE_STRATEGY)
+        )
 
     # Handle case where no stocks are found
     if all_stocks_from_table is None:
@@ -29,74 +69,368 @@ def get_all_ipo_listing_with_gmp_link():
     print(f"Total stocks found: {len(all_stocks_from_table)}")
     print("Stocks found:", extract_names(all_stocks_from_table))
 
+    # Names resolved in an earlier run (or pinned by hand) need no matching
+    unresolved = []
+    for stock in all_stocks_from_table:
+        resolved = store.lookup(stock["name"]) if store else None
+        if resolved:
+            stock["gmpUrl"], stock["gmpMatchConfidence"], _ = resolved
+        elif negative_cache.get("match", stock["name"]):
+            stock["gmpUrl"], stock["gmpMatchConfidence"] = None, 0.0
+        else:
+            unresolved.append(stock)
+    _listings_needed = bool(unresolved)
+    if not unresolved:
+        print(f"[DEBUG] {datetime.now()} All GMP URLs resolved from the store")
+        return all_stocks_from_table
+
     # Fetch GMP URLs available from ipowatch.in
-    gmp_urls = get_gmp_url_for_stocks()
+    upcoming, sme = (
+        gmp_urls_future.result() if gmp_urls_future else fetch_gmp_listings()
+    )
+    gmp_urls = (upcoming or []) + (sme or [])
     print(f"Total GMP URLs found: {len(gmp_urls)}")
+    # A name is only remembered as unmatched when both listings were read
+    remember_misses = upcoming is not None and sme is not None
 
-    all_stocks_with_gmp_url = []
-    for stock in all_stocks_from_table:
-        stock["gmpUrl"] = get_urls_by_names(stock["name"], gmp_urls)
-        all_stocks_with_gmp_url.append(stock)
+    with metrics.timed("ipo_name_match_duration_seconds", stage="index"):
+        matcher = GmpUrlMatcher(gmp_urls)
+    for stock in unresolved:
+        with metrics.timed("ipo_name_match_duration_seconds", stage="match"):
+            stock["gmpUrl"], stock["gmpMatchConfidence"] = matcher.match(stock["name"])
+        if stock["gmpUrl"] is None:
+            if remember_misses:
+                negative_cache.add("match", stock["name"], "no_match")
+        elif store:
+            store.save(stock["name"], stock["gmpUrl"], stock["gmpMatchConfidence"])
+        if stock["gmpMatchConfidence"] < 1.0:
+            print(
+                f"[DEBUG] {datetime.now()} Weak GMP match for {stock['name']}: "
+                f"{stock['gmpUrl']} ({stock['gmpMatchConfidence']})"
+            )
     # Return the list of all stocks with GMP URL
-    return all_stocks_with_gmp_url
+    return all_stocks_from_table
+
+
+# Fields of a /details payload filled by each section
+DETAILS_SECTIONS = {
+    "details": ("details",),
+    "gmp": ("gmpTimeline", "ipoDetails"),
+}
+
+# Section crawls by (section, url). A crawl that outlives its caller's
+# deadline stays here so the next caller picks up its result instead of
+# starting over; a finished crawl is handed out once, then dropped, and
+# one nobody came back for is dropped after DETAILS_CACHE_TTL.
+_section_crawls = {}
+_section_crawls_lock = Lock()
+
+
+# ------------------------------------------------
+#  Function to start (or join) the crawl of one /details section
+#  @param executor - ThreadPoolExecutor to run a new crawl on
+#  @param section - Key of DETAILS_SECTIONS
+#  @param fn - Function(url, deadline) doing the crawl
+#  @param url - Page URL
+#  @param deadline - Optional time.monotonic() value after which no fetch is started
+#  @return future - Future of fn's result
+# ------------------------------------------------
+def _section_crawl(executor, section, fn, url, deadline):
+    key = (section, url)
+    now = time.monotonic()
+    with _section_crawls_lock:
+        # A leftover result is only worth reusing while it would still be
+        # fresh in the response cache
+        expired = [
+            k
+            for k, (future, started) in _section_crawls.items()
+            if future.done() and now - started > Config.DETAILS_CACHE_TTL
+        ]
+        for k in expired:
+            del _section_crawls[k]
+        entry = _section_crawls.get(key)
+        if entry is None:
+            entry = (executor.submit(fn, url, deadline), now)
+            _section_crawls[key] = entry
+    return entry[0]
+
+
+# ------------------------------------------------
+#  Function to collect the result of a section crawl
+#  @param section - Key of DETAILS_SECTIONS
+#  @param url - Page URL
+#  @param future - Future from _section_crawl
+#  @return status, result - status is None for a finished crawl, "pending"
+#                           while it runs or when its deadline passed before
+#                           the page was fetched, "failed" when the page
+#                           could not be fetched
+# ------------------------------------------------
+def _section_result(section, url, future):
+    if not future.done():
+        return "pending", None
+    with _section_crawls_lock:
+        entry = _section_crawls.get((section, url))
+        if entry is not None and entry[0] is future:
+            del _section_crawls[(section, url)]
+    if isinstance(future.exception(), DeadlineExceeded):
+        return "pending", None
+    if isinstance(future.exception(), FetchFailed):
+        return "failed", None
+    return None, deepcopy(future.result())
 
 
 # ------------------------------------------------
 #  Function to get stock details and GMP from symbol
-# @param symbol - Stock symbol
+# @param details_url - zerodha IPO page URL
 # @param gmp_url - GMP URL
+# @param deadline_ms - Optional latency budget in milliseconds; sections
+#                      not ready in time are listed under "pending" and
+#                      left empty. Their crawl carries on in the background
+#                      and the next call for the same URLs picks it up.
+#                      Sections whose page could not be fetched are listed
+#                      under "failed".
 # @return stock - Stock details and GMP
 # ------------------------------------------------
 
 
-def get_stock_details_and_gmp_from_symbol(details_url, gmp_url):
+@coalesce
+def get_stock_details_and_gmp_from_symbol(details_url, gmp_url, deadline_ms=None):
     stock = {}
-    print(
-        f"[DEBUG] {datetime.now()} Fetching full ipo details for: {details_url} after sleep 5"
+    deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms else None
+    # The details page (zerodha) and the GMP page (ipowatch) live on different
+    # hosts, so fetch them side by side; scrape_page bounds per-host load.
+    executor = ThreadPoolExecutor(max_workers=2)
+    print(f"[DEBUG] {datetime.now()} Fetching full ipo details for: {details_url}")
+    details_future = (
+        _section_crawl(executor, "details", get_full_ipo_details, details_url, deadline)
+        if details_url
+        else None
+    )
+    print(f"[DEBUG] {datetime.now()} Fetching GMP timeline for: {gmp_url}")
+    gmp_future = (
+        _section_crawl(executor, "gmp", get_gmp_timeline, gmp_url, deadline)
+        if gmp_url
+        else None
     )
-    sleep(1)
-    if details_url:
-        stock["details"] = get_full_ipo_details(details_url)
-    print(
-        f"[DEBUG] {datetime.now()} Fetching GMP timeline for: {gmp_url} after sleep 5"
+    executor.shutdown(wait=False)
+    wait(
+        [f for f in (details_future, gmp_future) if f],
+        timeout=None if deadline is None else max(0, deadline - time.monotonic()),
     )
-    sleep(1)
-    if gmp_url:
-        gmp_data = get_gmp_timeline(gmp_url)
+
+    unfinished = {"pending": [], "failed": []}
+    if details_future:
+        status, stock["details"] = _section_result(
+            "details", details_url, details_future
+        )
+        if status:
+            unfinished[status].append("details")
+    if gmp_future:
+        status, gmp_data = _section_result("gmp", gmp_url, gmp_future)
         if gmp_data:
             stock["gmpTimeline"] = gmp_data.pop("gmpTimeline", [])
             stock["ipoDetails"] = gmp_data.pop("ipoDetails", [])
         else:
             stock["gmpTimeline"] = []
             stock["ipoDetails"] = {}
+        if status:
+            unfinished[status].append("gmp")
+    for status, sections in unfinished.items():
+        if sections:
+            print(f"[DEBUG] {datetime.now()} Sections {status}: {sections}")
+            stock[status] = sections
     return stock
 
 
 # ------------------------------------------------
-# Function to get details and GMP for all IPO
+#  Function to tell a failed /details crawl from a successful one
+#  A GMP page that is missing or has no rows yet is a successful crawl.
+#  @param stock - Payload from get_stock_details_and_gmp_from_symbol
+#  @return bool - True when a page could not be fetched or is still pending
+# ------------------------------------------------
+def details_crawl_failed(stock):
+    return not stock or "failed" in stock or "pending" in stock
+
+
+# ------------------------------------------------
+#  Function to fill the pending sections of a /details payload from an
+#  earlier payload for the same IPO
+#  Sections taken over are moved from "pending" to "stale".
+#  @param stock - Payload from get_stock_details_and_gmp_from_symbol
+#  @param previous - Earlier complete payload, or None
+#  @return stock - The same payload
+# ------------------------------------------------
+def fill_pending_sections(stock, previous):
+    if not previous:
+        return stock
+    pending = []
+    for section in stock.get("pending", []):
+        fields = DETAILS_SECTIONS[section]
+        if all(field in previous for field in fields):
+            for field in fields:
+                stock[field] = previous[field]
+            stock.setdefault("stale", []).append(section)
+        else:
+            pending.append(section)
+    if pending:
+        stock["pending"] = pending
+    else:
+        stock.pop("pending", None)
+    return stock
+
+
+# ------------------------------------------------
+# Function to crawl details and GMP for IPOs, yielding each as it is ready
+# IPOs are crawled concurrently on CRAWL_MAX_WORKERS threads; the number of
+# requests hitting any one host is capped inside scrape_page. The input
+# entries are left untouched, each result is a new dict.
 # @param stock_data - List of all IPOs
-# @return updated_stock_data - List of all IPOs with details and GMP
+# @return generator - (index in stock_data, IPO with details and GMP), in
+#                     completion order
 # ------------------------------------------------
-def get_details_and_gmp_for_all_ipo(stock_data):
-    updated_stock_data = []
-    for stock in stock_data:
+def iter_details_and_gmp_for_all_ipo(stock_data):
+    def crawl(stock):
         stock_details = get_stock_details_and_gmp_from_symbol(
-            stock["symbol"], stock["gmpUrl"]
+            stock.get("link"), stock.get("gmpUrl")
         )
-        stock.update(stock_details)
-        updated_stock_data.append(stock)
+        return {**stock, **stock_details}
+
+    with ThreadPoolExecutor(max_workers=Config.CRAWL_MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(crawl, stock): index
+            for index, stock in enumerate(stock_data)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+# ------------------------------------------------
+# Function to get details and GMP for all IPO
+# @param stock_data - List of all IPOs
+# @return updated_stock_data - List of all IPOs with details and GMP, in input order
+# ------------------------------------------------
+def get_details_and_gmp_for_all_ipo(stock_data):
+    updated_stock_data = [None] * len(stock_data)
+    for index, stock in iter_details_and_gmp_for_all_ipo(stock_data):
+        updated_stock_data[index] = stock
     return updated_stock_data
 
 
+# ------------------------------------------------
+# Function to crawl only new, active or stale IPOs and merge them into the store
+# @param all_stocks - Calendar entries with GMP links
+# @param store - IpoStore
+# @param max_age - Seconds after which stored data is re-crawled
+# @return generator - (calendar index, merged record) for the whole
+#                     calendar: up-to-date IPOs first, then crawled ones in
+#                     completion order
+# ------------------------------------------------
+def iter_details_and_gmp_incremental(all_stocks, store, max_age):
+    to_crawl, _ = plan_incremental_crawl(store, all_stocks, max_age)
+    crawl_ids = {id(stock) for stock in to_crawl}
+    # Calendar index of each entry of to_crawl (both keep calendar order)
+    crawl_indexes = []
+    for index, stock in enumerate(all_stocks):
+        if id(stock) in crawl_ids:
+            crawl_indexes.append(index)
+        else:
+            store.save(stock, crawled=False)
+            yield index, store.record_for(stock)
+    for crawl_index, stock in iter_details_and_gmp_for_all_ipo(to_crawl):
+        # A failed crawl is not recorded as crawled, so it is retried
+        store.save(stock, crawled=not details_crawl_failed(stock))
+        yield crawl_indexes[crawl_index], store.record_for(stock)
+
+
+# ------------------------------------------------
+# Function to get live subscription numbers for open IPOs
+# @return ipos - List of IPO subscription data, None if the page failed to load
+# ------------------------------------------------
+@coalesce
+def get_subscription_listing():
+    soup = scrape_page(
+        SUBSCRIPTION_URL,
+        headers=SUBSCRIPTION_HEADERS,
+        strategy=SUBSCRIPTION_PAGE_STRATEGY,
+    )
+    if not soup:
+        return None
+    return parse_subscription_page(soup)
+
+
 # Main function
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl IPO details and GMP data")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only crawl new, active or stale IPOs, using the local IPO store",
+    )
+    parser.add_argument("--store", default=Config.IPO_STORE_PATH)
+    parser.add_argument(
+        "--max-age",
+        type=int,
+        default=Config.INCREMENTAL_MAX_AGE,
+        help="Seconds after which stored IPO data is crawled again",
+    )
+    parser.add_argument("--output", default="stocks.json")
+    parser.add_argument(
+        "--format",
+        choices=["json", "jsonl"],
+        default="json",
+        help="json: records are streamed to <output>.partial.jsonl and turned "
+        "into a JSON array in calendar order atomically at the end; jsonl: "
+        "streamed to <output> in completion order",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=Config.PROFILE_DIR,
+        default=None,
+        metavar="DIR",
+        help="Profile the whole run and save the report to DIR",
+    )
+    cli_args = parser.parse_args()
+
+    profiler = Profiler("scraper_main") if cli_args.profile else None
+    if profiler:
+        profiler.start()
 
     all_stocks_with_gmp = get_all_ipo_listing_with_gmp_link()
 
-    # Fetch all the individual stock data
-    individual_stock_data = get_details_and_gmp_for_all_ipo(all_stocks_with_gmp)
-    individual_stock_data_json_data = json.dumps(individual_stock_data, indent=2)
+    # Fetch all the individual stock data, writing each IPO as it completes
+    ipo_store = IpoStore(cli_args.store) if cli_args.incremental else None
+    if ipo_store:
+        individual_stock_data = iter_details_and_gmp_incremental(
+            all_stocks_with_gmp, ipo_store, cli_args.max_age
+        )
+    else:
+        individual_stock_data = iter_details_and_gmp_for_all_ipo(all_stocks_with_gmp)
+
+    lines_path = (
+        cli_args.output
+        if cli_args.format == "jsonl"
+        else cli_args.output + ".partial.jsonl"
+    )
+    # Records are written as they complete; for the JSON array their calendar
+    # index goes along so the final file keeps calendar order
+    with JsonLinesWriter(lines_path) as writer:
+        for index, stock in individual_stock_data:
+            if cli_args.format == "jsonl":
+                writer.write(stock)
+            else:
+                writer.write({"index": index, "record": stock})
+    if ipo_store:
+        ipo_store.close()
+
+    if cli_args.format == "json":
+        jsonl_to_json_array(lines_path, cli_args.output, indexed=True)
+        os.remove(lines_path)
 
-    write_json(individual_stock_data_json_data, "stocks.json")
+    print(f"{writer.count} IPOs written to {cli_args.output}")
+    print(f"Parsed page cache: {parsed_page_cache.stats()}")
 
-    print("Data written to stocks.json")
+    if profiler:
+        profiler.stop()
+        print(profiler.report(Config.PROFILE_TOP_N))
+        print(f"Profile saved to {profiler.save(cli_args.profile, Config.PROFILE_TOP_N)}")
@@ -0,0 +1,69 @@
+from copy import deepcopy
+from functools import wraps
+from threading import Event, Lock
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+# ------------------------------------------------
+#  Coalesces concurrent calls that share a key
+#  The first caller for a key runs the function; callers arriving while it
+#  is in flight block on it and receive a copy of its result (or its error).
+# ------------------------------------------------
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = Lock()
+
+    # ------------------------------------------------
+    #  Function to run fn once per in-flight key
+    #  @param key - Hashable key identifying the work
+    #  @param fn - Function to run
+    #  @return result - Result of fn (followers get a deep copy)
+    # ------------------------------------------------
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return deepcopy(call.result)
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+_group = SingleFlight()
+
+
+# ------------------------------------------------
+#  Decorator coalescing concurrent calls with identical arguments
+#  @param fn - Function to wrap
+#  @return wrapper - Function sharing in-flight results between callers
+# ------------------------------------------------
+def coalesce(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+        return _group.do(key, fn, *args, **kwargs)
+
+    return wrapper
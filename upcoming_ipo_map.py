@@ -1,93 +1,208 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import re
-from time import sleep
-from crawler_helper import scrape_page
+from constants import IPOWATCH_BASE_URL
+from crawler_helper import partial_strategy, scrape_page
+from metrics import metrics
 
 
-UPCOMING_IPO = "https://ipowatch.in/upcoming-ipo-calendar-ipo-list/"
-UPCOMING_SME_IPO = "https://ipowatch.in/upcoming-sme-ipo-calendar-list/"
+UPCOMING_IPO = IPOWATCH_BASE_URL + "upcoming-ipo-calendar-ipo-list/"
+UPCOMING_SME_IPO = IPOWATCH_BASE_URL + "upcoming-sme-ipo-calendar-list/"
+
+# Only the listing tables are read from the ipowatch calendar pages
+LISTING_PAGE_STRATEGY = partial_strategy("table")
 
 
 def ipo_name_to_url_map(url):
     try:
         print(f"[DEBUG] {datetime.now()} -- Scraping {url} for IPO data")
-        scraped_data = scrape_page(url)
+        scraped_data = scrape_page(url, strategy=LISTING_PAGE_STRATEGY)
         print(f"[DEBUG] {datetime.now()} -- Scraped {url} for IPO data")
-        tables = scraped_data.find_all("table")  # Find all tables
-        ipo_data = []  # Array to store the IPO name and URL objects
-
-        if not tables:
-            return ipo_data
-
-        # Iterate through all tables
-        for table in tables:
-            rows = table.find_all("tr")[1:]  # Get all rows except the header row
-
-            for row in rows:
-                first_td = row.find("td")  # Get the first <td> element
-                if first_td and first_td.find("a"):
-                    ipo_name = first_td.get_text(strip=True).replace(
-                        "\n", " "
-                    )  # Extract the IPO name (text in <td>) and replace newlines with space
-                    ipo_url = first_td.find("a")[
-                        "href"
-                    ]  # Extract the URL from the <a> tag
-                    ipo_data.append(
-                        {"name": ipo_name, "url": ipo_url}
-                    )  # Append as object
-
+        ipo_data = parse_ipo_listing_page(scraped_data)
         print(f"[DEBUG] {datetime.now()} -- Returning IPO data for url {url}")
         return ipo_data
     except Exception as e:
+        metrics.increment("ipo_parse_failures_total", parser="parse_ipo_listing_page")
         print(f"Error getting {url} IPO data: {e}")
         return None
 
 
+# ------------------------------------------------
+#  Function to extract IPO names and links from an ipowatch listing page
+#  @param scraped_data - BeautifulSoup object of the page
+#  @return ipo_data - List of {"name", "url"} objects
+# ------------------------------------------------
+def parse_ipo_listing_page(scraped_data):
+    tables = scraped_data.find_all("table")  # Find all tables
+    ipo_data = []  # Array to store the IPO name and URL objects
+
+    if not tables:
+        return ipo_data
+
+    # Iterate through all tables
+    for table in tables:
+        rows = table.find_all("tr")[1:]  # Get all rows except the header row
+
+        for row in rows:
+            first_td = row.find("td")  # Get the first <td> element
+            if first_td and first_td.find("a"):
+                ipo_name = first_td.get_text(strip=True).replace(
+                    "\n", " "
+                )  # Extract the IPO name (text in <td>) and replace newlines with space
+                ipo_url = first_td.find("a")[
+                    "href"
+                ]  # Extract the URL from the <a> tag
+                ipo_data.append(
+                    {"name": ipo_name, "url": ipo_url}
+                )  # Append as object
+
+    return ipo_data
+
+
+# ------------------------------------------------
+#  Function to fetch the Mainboard and SME listing pages side by side
+#  @return (upcoming, sme) - ipo_name_to_url_map output per page, None for
+#                            a page that could not be read
+# ------------------------------------------------
+def fetch_gmp_listings():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        print(f"[DEBUG] {datetime.now()} -- Getting Mainboard GMP URLs for stocks")
+        upcoming_future = executor.submit(ipo_name_to_url_map, UPCOMING_IPO)
+        print(f"[DEBUG] {datetime.now()} -- Getting SME GMP URLs for SME stocks")
+        sme_future = executor.submit(ipo_name_to_url_map, UPCOMING_SME_IPO)
+    return upcoming_future.result(), sme_future.result()
+
+
 def get_gmp_url_for_stocks():
-    print(
-        f"[DEBUG] {datetime.now()} -- Getting Mainboard GMP URLs for stocks, after sleep 5"
+    upcoming, sme = fetch_gmp_listings()
+    print(f"[DEBUG] {datetime.now()} -- Returning Mainboard and SME GMP URLs")
+    # A failed listing fetch returns None; keep whatever the other page gave
+    return (upcoming or []) + (sme or [])
+
+
+# Words that do not identify a company (dropped from both sides before matching)
+STOP_WORDS = frozenset(
+    [
+        "ltd",
+        "limited",
+        "pvt",
+        "private",
+        "industries",
+        "solutions",
+        "international",
+        "technologies",
+        "ipo",
+        "sme",
+    ]
+)
+GMP_URL_STOP_WORDS = re.compile(
+    r"\b(-ltd|-pvt|-industries|-solutions|-international|-technologies|-india)\b",
+    flags=re.IGNORECASE,
+)
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name_tokens(name):
+    return tuple(
+        token
+        for token in NON_ALNUM.split(name.lower())
+        if token and token not in STOP_WORDS
     )
-    sleep(1)
-    upcoming = ipo_name_to_url_map(UPCOMING_IPO)
-    print(
-        f"[DEBUG] {datetime.now()} -- Getting SME GMP URLs for SME stocks, after sleep 5"
+
+
+def clean_gmp_url(url):
+    cleaned_url = GMP_URL_STOP_WORDS.sub("", url).strip().lower()
+    # Replace specific part of the URL if needed
+    return cleaned_url.replace(
+        "ipo-date-review-price-allotment-details", "ipo-gmp-grey-market-premium"
     )
-    sleep(1)
-    sme = ipo_name_to_url_map(UPCOMING_SME_IPO)
-    print(f"[DEBUG] {datetime.now()} -- Returning Mainboard and SME GMP URLs")
-    return upcoming + sme
 
 
-def get_urls_by_names(name, data_list):
-    # Normalize the input name (remove common words like Ltd, Pvt, etc., and lowercase it)
-    cleaned_name = (
-        re.sub(
-            r"\b(ltd|pvt|industries|solutions|international|technologies)\b",
-            "",
-            name,
-            flags=re.IGNORECASE,
-        )
-        .strip()
-        .lower()
+# ------------------------------------------------
+#  Resolves stock names to ipowatch GMP URLs
+#  Built once from get_gmp_url_for_stocks() output. Names are normalised to
+#  stop-word free token tuples and indexed by token, so a lookup only scores
+#  the listings sharing a token with the stock name.
+#
+#  Scores:
+#    1.0        - same tokens
+#    0.5 .. 1.0 - one name is a contiguous token run of the other,
+#                 scaled by how much of the longer name it covers
+#    < 0.5      - only some tokens overlap (Jaccard / 2), reported but
+#                 not used as a link
+#  Ties go to the listing that appeared first (mainboard before SME).
+# ------------------------------------------------
+class GmpUrlMatcher:
+    MIN_CONFIDENCE = 0.5
+
+    def __init__(self, data_list):
+        self._entries = []
+        self._index = {}
+        for data in data_list or []:
+            tokens = normalize_name_tokens(data["name"])
+            if not tokens:
+                continue
+            position = len(self._entries)
+            self._entries.append((tokens, clean_gmp_url(data["url"])))
+            for token in set(tokens):
+                self._index.setdefault(token, []).append(position)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ------------------------------------------------
+    #  Function to find the best GMP URL for a stock name
+    #  @param name - Stock name as listed on the home page
+    #  @return (url, confidence) - url is None when confidence < MIN_CONFIDENCE
+    # ------------------------------------------------
+    def match(self, name):
+        tokens = normalize_name_tokens(name)
+        if not tokens:
+            return None, 0.0
+
+        candidates = set()
+        for token in set(tokens):
+            candidates.update(self._index.get(token, ()))
+
+        best_position, best_score = None, 0.0
+        for position in sorted(candidates):
+            score = _match_score(tokens, self._entries[position][0])
+            if score > best_score:
+                best_position, best_score = position, score
+
+        if best_position is None or best_score < self.MIN_CONFIDENCE:
+            return None, round(best_score, 3)
+        return self._entries[best_position][1], round(best_score, 3)
+
+
+def _contains_run(longer, shorter):
+    size = len(shorter)
+    return any(
+        longer[i : i + size] == shorter for i in range(len(longer) - size + 1)
+    )
+
+
+def _match_score(name_tokens, listing_tokens):
+    if name_tokens == listing_tokens:
+        return 1.0
+    longer, shorter = (
+        (name_tokens, listing_tokens)
+        if len(name_tokens) >= len(listing_tokens)
+        else (listing_tokens, name_tokens)
     )
+    if _contains_run(longer, shorter):
+        return 0.5 + 0.5 * len(shorter) / len(longer)
+    common = set(name_tokens) & set(listing_tokens)
+    return 0.5 * len(common) / len(set(name_tokens) | set(listing_tokens))
 
-    for data in data_list:
-        if cleaned_name in data["name"].lower() or data["name"].lower() in cleaned_name:
-            url = data["url"]
-            cleaned_url = (
-                re.sub(
-                    r"\b(-ltd|-pvt|-industries|-solutions|-international|-technologies|-india)\b",
-                    "",
-                    url,
-                    flags=re.IGNORECASE,
-                )
-                .strip()
-                .lower()
-            )
-            # Replace specific part of the URL if needed
-            cleaned_url = cleaned_url.replace(
-                "ipo-date-review-price-allotment-details", "ipo-gmp-grey-market-premium"
-            )
-            return cleaned_url
-
-    return None
+
+# ------------------------------------------------
+#  Function to get the GMP URL for one stock name
+#  Prefer building one GmpUrlMatcher and reusing it for many names.
+#  @param name - Stock name
+#  @param data_list - Output of get_gmp_url_for_stocks()
+#  @return url - GMP URL or None
+# ------------------------------------------------
+def get_urls_by_names(name, data_list):
+    url, _ = GmpUrlMatcher(data_list).match(name)
+    return url